@@ -0,0 +1,224 @@
+import os
+import sys
+import json
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+from time import perf_counter
+
+# Must be set before Qt creates the application
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QImage, QPainter
+from PyQt6.QtCore import PYQT_VERSION_STR, QT_VERSION_STR
+import pytz
+
+import digital_analog_clock as dac
+
+# Headless benchmarks for ClockWidget painting, DigitalClock.update_clocks and
+# batch timezone conversion. Results are printed (or written with --output)
+# as JSON so runs can be diffed.
+#
+#   python bench_clocks.py --clocks 1,10,100,500 --sizes 100,200,400 --ticks 60
+#   python bench_clocks.py --clocks '' --convert-epochs 1000000 --convert-zones 50
+
+
+def int_list(text):
+    return [int(value) for value in text.split(',') if value]
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    count = len(ordered)
+    return {
+        'mean': sum(ordered) / count,
+        'p50': ordered[count // 2],
+        'p95': ordered[min(count - 1, int(count * 0.95))],
+        'max': ordered[-1]
+    }
+
+
+def peak_rss_kb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def zone_names(count):
+    zones = list(pytz.common_timezones)
+    return [zones[i % len(zones)] for i in range(count)]
+
+
+def tick_instants(ticks, after=None):
+    # Ticks must come after the formatter's current second, otherwise every
+    # format() call takes its uncached late-caller path
+    start = datetime.now(pytz.utc).replace(microsecond=0)
+    if after is not None and after >= start:
+        start = after
+    return [start + timedelta(seconds=i + 1) for i in range(ticks)]
+
+
+def measure_allocations(run):
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak // 1024
+
+
+def bench_paint(clocks, size, ticks):
+    widgets = []
+    for zone in zone_names(clocks):
+        widget = dac.ClockWidget(zone)
+        widget.setMinimumSize(1, 1)
+        widget.resize(size, size)
+        widgets.append(widget)
+    image = QImage(size, size, QImage.Format.Format_ARGB32_Premultiplied)
+    instants = tick_instants(ticks)
+
+    def run(samples=None):
+        for now_utc in instants:
+            started = perf_counter()
+            for widget in widgets:
+                widget.update_time(now_utc)
+                painter = QPainter(image)
+                widget.render(painter)
+                painter.end()
+            if samples is not None:
+                samples.append((perf_counter() - started) * 1000)
+
+    run()  # warm the dial cache and resolver
+    samples = []
+    run(samples)
+    return {
+        'benchmark': 'paint',
+        'clocks': clocks,
+        'size': size,
+        'ticks': ticks,
+        'frame_ms': summarize(samples),
+        'per_clock_ms': sum(samples) / len(samples) / clocks,
+        'alloc_peak_kb': measure_allocations(run),
+        'rss_peak_kb': peak_rss_kb()
+    }
+
+
+def bench_update(clocks, ticks):
+    window = dac.DigitalClock()
+    window.timezones = zone_names(clocks)
+    window.update_clocks_ui()
+    # Hidden displays and clocks are skipped by update_clocks
+    window.show()
+    QApplication.processEvents()
+
+    def run(samples=None):
+        for now_utc in tick_instants(ticks, dac.time_formatter.second):
+            started = perf_counter()
+            window.update_clocks(now_utc)
+            if samples is not None:
+                samples.append((perf_counter() - started) * 1000)
+
+    run()
+    formatter = dac.time_formatter.stats()
+    samples = []
+    run(samples)
+    formatter = {key: value - formatter[key] for key, value in dac.time_formatter.stats().items()}
+    result = {
+        'benchmark': 'update_clocks',
+        'clocks': clocks,
+        'ticks': ticks,
+        'tick_ms': summarize(samples),
+        'per_clock_ms': sum(samples) / len(samples) / clocks,
+        'format_cache': formatter,
+        'alloc_peak_kb': measure_allocations(run),
+        'rss_peak_kb': peak_rss_kb()
+    }
+    window.close()
+    window.deleteLater()
+    return result
+
+
+def bench_convert(count, zones, repeats=5):
+    names = zone_names(zones)
+    start = int(datetime(2000, 1, 1, tzinfo=pytz.utc).timestamp())
+    # Spread over ~40 years so every DST rule in the tables is exercised
+    epochs = [start + (i * 1_262_303) % 1_262_304_000 for i in range(count)]
+    try:
+        import numpy
+        epochs = numpy.array(epochs, dtype=numpy.int64)
+    except ImportError:
+        numpy = None
+    dac.tz_resolver.convert_batch(epochs[:1], names)  # load the transition tables
+    samples = []
+    for _ in range(repeats):
+        started = perf_counter()
+        dac.tz_resolver.convert_batch(epochs, names)
+        samples.append((perf_counter() - started) * 1000)
+    return {
+        'benchmark': 'convert_batch',
+        'epochs': count,
+        'zones': zones,
+        'numpy': numpy is not None,
+        'batch_ms': summarize(samples),
+        'ns_per_conversion': min(samples) * 1e6 / (count * zones),
+        'rss_peak_kb': peak_rss_kb()
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark clock painting and updates offscreen')
+    parser.add_argument('--clocks', type=int_list, default=[1, 10, 100, 500],
+                        help='comma-separated clock counts (default: 1,10,100,500)')
+    parser.add_argument('--sizes', type=int_list, default=[100, 200, 400],
+                        help='comma-separated analog clock sizes in pixels (default: 100,200,400)')
+    parser.add_argument('--ticks', type=int, default=60, help='ticks per scenario (default: 60)')
+    parser.add_argument('--convert-epochs', type=int_list, default=[100000],
+                        help='comma-separated epoch counts for convert_batch (default: 100000)')
+    parser.add_argument('--convert-zones', type=int, default=50,
+                        help='zones per convert_batch call (default: 50)')
+    parser.add_argument('--output', help='write JSON results to this file instead of stdout')
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    results = []
+    # DigitalClock keeps its history next to the working directory
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            for clocks in args.clocks:
+                for size in args.sizes:
+                    results.append(bench_paint(clocks, size, args.ticks))
+                results.append(bench_update(clocks, args.ticks))
+                app.processEvents()
+            for count in args.convert_epochs:
+                results.append(bench_convert(count, args.convert_zones))
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'qt': QT_VERSION_STR,
+            'pyqt': PYQT_VERSION_STR,
+            'platform': platform.platform(),
+            'qpa': os.environ.get('QT_QPA_PLATFORM')
+        },
+        'results': results
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,95 +1,1744 @@
+import time
+startup_marks = [('start', time.perf_counter())]
+import os
+import re
+import csv
+import gzip
 import sys
 import math
-from datetime import datetime
+import argparse
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from fnmatch import fnmatchcase
+from heapq import merge
+from enum import IntEnum
+from datetime import datetime, timedelta
+startup_marks.append(('import stdlib', time.perf_counter()))
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QComboBox,
     QPushButton, QTextEdit, QLabel, QStyleFactory, QTabWidget, QGridLayout,
-    QScrollArea, QMenuBar, QMenu, QFileDialog, QMessageBox, QLineEdit, QListWidget, QListWidgetItem
+    QMenuBar, QMenu, QFileDialog, QMessageBox, QLineEdit, QListWidget, QListWidgetItem,
+    QCheckBox, QTableView, QHeaderView, QAbstractItemView, QProgressDialog, QCompleter, QSpinBox
 )
-from PyQt6.QtCore import Qt, QTimer, QRectF
-from PyQt6.QtGui import QIcon, QPalette, QColor, QFont, QPainter, QPen, QBrush
+from PyQt6.QtCore import (
+    Qt, QObject, QThread, QEvent, QAbstractTableModel, QModelIndex, QStringListModel, QTimer,
+    QLine, QRect, QRectF, QFileSystemWatcher, pyqtSignal
+)
+from PyQt6.QtGui import QIcon, QPalette, QColor, QFont, QPainter, QPen, QBrush, QPixmap, QKeySequence
+startup_marks.append(('import PyQt6', time.perf_counter()))
 import json
 from pathlib import Path
 import pytz
+startup_marks.append(('import pytz', time.perf_counter()))
 
 # Developed by Hamid Yarali
 # GitHub: https://github.com/HamidYaraliOfficial
 # Instagram: https://www.instagram.com/hamidyaraliofficial?igsh=MWpxZjhhMHZuNnlpYQ==
 # Telegram: @Hamid_Yarali
 
+class StartupProfiler:
+    def __init__(self, enabled=False, marks=None):
+        self.enabled = enabled
+        self.marks = list(marks or []) if enabled else []
+        self.reported = 1
+
+    def mark(self, phase):
+        if self.enabled:
+            self.marks.append((phase, time.perf_counter()))
+
+    def report(self, stream=None):
+        # Prints phases recorded since the previous report
+        if not self.enabled or not self.marks:
+            return
+        stream = stream or sys.stderr
+        start = self.marks[0][1]
+        for i in range(max(self.reported, 1), len(self.marks)):
+            phase, stamp = self.marks[i]
+            print('%-24s %9.1f ms %9.1f ms' % (phase, (stamp - self.marks[i - 1][1]) * 1000, (stamp - start) * 1000),
+                  file=stream)
+        self.reported = len(self.marks)
+
+
+class Histogram:
+    # Cumulative-bucket latency histogram in seconds, Prometheus style
+    buckets = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+               0.05, 0.1, 0.25, 0.5, 1.0)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+        return self.max
+
+
+class Metrics:
+    descriptions = {
+        'tick_lateness': 'Delay between the wall-clock boundary and the tick firing',
+        'update_clocks': 'Time spent in DigitalClock.update_clocks',
+        'paint': 'Time spent in one ClockWidget.paintEvent',
+        'update_history_ui': 'Time spent in DigitalClock.update_history_ui'
+    }
+
+    def __init__(self):
+        self.enabled = False
+        self.histograms = {}
+        self.counters = {'missed_seconds': 0}
+
+    def start(self):
+        return time.perf_counter() if self.enabled else None
+
+    def stop(self, name, started):
+        if started is not None:
+            self.observe(name, time.perf_counter() - started)
+
+    def observe(self, name, value):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(value)
+
+    def increment(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self):
+        lines = []
+        for name, histogram in sorted(self.histograms.items()):
+            lines.append('%-18s n=%-6d p50<=%.2fms p95<=%.2fms max=%.2fms' % (
+                name, histogram.count, histogram.quantile(0.5) * 1000,
+                histogram.quantile(0.95) * 1000, histogram.max * 1000))
+        for name, value in sorted(self.counters.items()):
+            lines.append('%-18s %d' % (name, value))
+        stats = tz_resolver.stats()
+        lines.append('tz cache           hits=%d misses=%d lookups=%d' % (stats['hits'], stats['misses'], stats['lookups']))
+        stats = time_formatter.stats()
+        lines.append('format cache       hits=%d misses=%d' % (stats['hits'], stats['misses']))
+        return '\n'.join(lines)
+
+    def exposition(self):
+        lines = []
+        for name, histogram in sorted(self.histograms.items()):
+            metric = 'clock_%s_seconds' % name
+            lines.append('# HELP %s %s' % (metric, self.descriptions.get(name, name)))
+            lines.append('# TYPE %s histogram' % metric)
+            cumulative = 0
+            for bound, count in zip(self.buckets_labels(), histogram.counts):
+                cumulative += count
+                lines.append('%s_bucket{le="%s"} %d' % (metric, bound, cumulative))
+            lines.append('%s_sum %.9f' % (metric, histogram.total))
+            lines.append('%s_count %d' % (metric, histogram.count))
+        for name, value in sorted(self.counters.items()):
+            metric = 'clock_%s_total' % name
+            lines.append('# TYPE %s counter' % metric)
+            lines.append('%s %d' % (metric, value))
+        for name, value in sorted(tz_resolver.stats().items()):
+            metric = 'clock_tz_cache_%s_total' % name
+            lines.append('# TYPE %s counter' % metric)
+            lines.append('%s %d' % (metric, value))
+        for name, value in sorted(time_formatter.stats().items()):
+            metric = 'clock_format_cache_%s_total' % name
+            lines.append('# TYPE %s counter' % metric)
+            lines.append('%s %d' % (metric, value))
+        return '\n'.join(lines) + '\n'
+
+    def buckets_labels(self):
+        return ['%g' % bound for bound in Histogram.buckets] + ['+Inf']
+
+
+metrics = Metrics()
+
+
+class MetricsServer(QObject):
+    # Answers every connection to server with the current metrics as a plain
+    # HTTP response
+    def __init__(self, server):
+        super().__init__(server)
+        self.server = server
+        server.newConnection.connect(self.serve)
+
+    def serve(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            socket.readyRead.connect(lambda socket=socket: self.respond(socket))
+            socket.disconnected.connect(socket.deleteLater)
+
+    def respond(self, socket):
+        # readyRead can fire again for the rest of the request; answer once
+        socket.readyRead.disconnect()
+        body = metrics.exposition().encode('utf-8')
+        socket.write(b'HTTP/1.0 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n'
+                     b'Content-Length: ' + str(len(body)).encode() + b'\r\n\r\n' + body)
+        socket.disconnectFromHost()
+
+
+def format_offset(seconds):
+    # 19800 -> "+05:30"
+    minutes = seconds // 60
+    sign = '+' if minutes >= 0 else '-'
+    return '%s%02d:%02d' % (sign, abs(minutes) // 60, abs(minutes) % 60)
+
+
+class TransitionTable:
+    # A zone's offset history as parallel columns: from epochs[i] (UTC
+    # seconds) on, the zone is offsets[i] seconds ahead of UTC, dst[i] says
+    # whether that is daylight saving time
+    __slots__ = ('epochs', 'offsets', 'dst', '_arrays')
+
+    def __init__(self, tz):
+        times = getattr(tz, '_utc_transition_times', None)
+        if times:
+            epoch = datetime(1970, 1, 1)
+            self.epochs = array('q', [(t - epoch) // timedelta(seconds=1) for t in times])
+            self.offsets = array('l', [int(offset.total_seconds()) for offset, _, _ in tz._transition_info])
+            self.dst = array('B', [bool(dst) for _, dst, _ in tz._transition_info])
+        else:
+            # UTC and fixed-offset zones
+            self.epochs = array('q', [-(1 << 62)])
+            self.offsets = array('l', [int(tz.utcoffset(datetime(2000, 1, 1)).total_seconds())])
+            self.dst = array('B', [0])
+        self._arrays = None
+
+    def index(self, epoch):
+        return max(bisect_right(self.epochs, epoch) - 1, 0)
+
+    def bounds(self, epoch):
+        # UTC epoch range [start, end) sharing epoch's offset; None is unbounded
+        i = bisect_right(self.epochs, epoch)
+        start = self.epochs[i - 1] if i > 1 else None
+        end = self.epochs[i] if i < len(self.epochs) else None
+        return start, end
+
+    def next_change(self, epoch):
+        # First transition after epoch that moves the offset or flips DST;
+        # (epoch, offset_before, offset_after, dst_after) or None
+        i = max(bisect_right(self.epochs, epoch), 1)
+        for j in range(i, len(self.epochs)):
+            if self.offsets[j] != self.offsets[j - 1] or self.dst[j] != self.dst[j - 1]:
+                return self.epochs[j], self.offsets[j - 1], self.offsets[j], bool(self.dst[j])
+        return None
+
+    def arrays(self, np):
+        if self._arrays is None:
+            self._arrays = (np.frombuffer(self.epochs, dtype=np.int64),
+                            np.array(self.offsets, dtype=np.int32),
+                            np.array(self.dst, dtype=bool))
+        return self._arrays
+
+
+class TimezoneResolver:
+    def __init__(self):
+        self._zones = {}
+        self._tables = {}
+        # name -> (valid_from, valid_until, utcoffset, tzinfo), naive UTC bounds
+        self._offsets = {}
+        self.hits = 0
+        self.misses = 0
+        self.lookups = 0
+
+    def get(self, name):
+        tz = self._zones.get(name)
+        if tz is None:
+            tz = pytz.timezone(name)
+            self.lookups += 1
+            self._zones[name] = tz
+        return tz
+
+    def localize(self, name, now_utc):
+        # Until the zone's next transition the local time is one addition away
+        naive = now_utc.replace(tzinfo=None)
+        entry = self._offsets.get(name)
+        if entry is not None and entry[0] <= naive < entry[1]:
+            self.hits += 1
+            return (naive + entry[2]).replace(tzinfo=entry[3])
+
+        self.misses += 1
+        tz = self.get(name)
+        local = now_utc.astimezone(tz)
+        epoch = datetime(1970, 1, 1)
+        start, end = self.table(name).bounds((naive - epoch) // timedelta(seconds=1))
+        valid_from = epoch + timedelta(seconds=start) if start is not None else datetime.min
+        valid_until = epoch + timedelta(seconds=end) if end is not None else datetime.max
+        self._offsets[name] = (valid_from, valid_until, local.utcoffset(), local.tzinfo)
+        return local
+
+    def now(self, name):
+        return self.localize(name, datetime.now(pytz.utc))
+
+    def convert(self, name, instant):
+        # Arbitrary instants (history rows) must not evict the tick cache
+        return instant.astimezone(self.get(name))
+
+    def upcoming_changes(self, zones, now_utc):
+        # Next offset change of every zone that has one, soonest first
+        epoch = int(now_utc.timestamp())
+        changes = []
+        for name in dict.fromkeys(zones):
+            change = self.table(name).next_change(epoch)
+            if change is not None:
+                changes.append((change[0], name) + change[1:])
+        changes.sort()
+        return changes
+
+    def table(self, name):
+        table = self._tables.get(name)
+        if table is None:
+            table = self._tables[name] = TransitionTable(self.get(name))
+        return table
+
+    def convert_batch(self, epochs, zones):
+        # Converts UTC epoch seconds for every zone at once. Returns (local,
+        # offsets, dst), each with one row per zone and one column per epoch:
+        # local wall-clock seconds (view as datetime64[s] for dates), UTC
+        # offsets in seconds and DST flags. NumPy is imported on first use and
+        # is optional; without it the same rows come back as lists.
+        tables = [self.table(name) for name in zones]
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+        if np is None:
+            local, offsets, dst = [], [], []
+            for table in tables:
+                rows = [table.index(epoch) for epoch in epochs]
+                offsets.append([table.offsets[i] for i in rows])
+                dst.append([bool(table.dst[i]) for i in rows])
+                local.append([epoch + offset for epoch, offset in zip(epochs, offsets[-1])])
+            return local, offsets, dst
+
+        epochs = np.asarray(epochs)
+        if epochs.dtype.kind == 'f':
+            epochs = np.floor(epochs)
+        epochs = epochs.astype(np.int64, copy=False).ravel()
+        local = np.empty((len(tables), epochs.size), dtype=np.int64)
+        offsets = np.empty((len(tables), epochs.size), dtype=np.int32)
+        dst = np.empty((len(tables), epochs.size), dtype=bool)
+        if not tables:
+            return local, offsets, dst
+        # Every zone's transitions merged into one grid: each epoch is located
+        # once, then per zone it is a gather from a grid-sized lookup table
+        grid = np.unique(np.concatenate([table.arrays(np)[0] for table in tables]))
+        cells = np.searchsorted(grid, epochs, side='right') - 1
+        np.maximum(cells, 0, out=cells)
+        for row, table in enumerate(tables):
+            table_epochs, table_offsets, table_dst = table.arrays(np)
+            rows = np.searchsorted(table_epochs, grid, side='right') - 1
+            np.maximum(rows, 0, out=rows)
+            np.take(table_offsets[rows], cells, out=offsets[row])
+            np.take(table_dst[rows], cells, out=dst[row])
+            np.add(epochs, offsets[row], out=local[row])
+        return local, offsets, dst
+
+    def snapshot(self):
+        # name -> [valid_from, valid_until, offset], epoch seconds; None for open ends
+        epoch = datetime(1970, 1, 1)
+        snapshot = {}
+        for name, (valid_from, valid_until, offset, _) in self._offsets.items():
+            snapshot[name] = [None if valid_from == datetime.min else int((valid_from - epoch).total_seconds()),
+                              None if valid_until == datetime.max else int((valid_until - epoch).total_seconds()),
+                              int(offset.total_seconds())]
+        return snapshot
+
+    def prime(self, snapshot, now_utc):
+        # Offsets still valid now are served without loading the zone; the
+        # real tzinfo replaces the fixed one at the next transition
+        now = int(now_utc.timestamp())
+        for name, (valid_from, valid_until, offset) in snapshot.items():
+            if name in self._offsets or offset % 60:
+                continue
+            if (valid_from is None or valid_from <= now) and (valid_until is None or now < valid_until):
+                try:
+                    self._offsets[name] = (
+                        datetime.min if valid_from is None else datetime.fromtimestamp(valid_from, pytz.utc).replace(tzinfo=None),
+                        datetime.max if valid_until is None else datetime.fromtimestamp(valid_until, pytz.utc).replace(tzinfo=None),
+                        timedelta(seconds=offset),
+                        pytz.FixedOffset(offset // 60))
+                except (OverflowError, OSError, ValueError):
+                    # Out-of-range bounds from a damaged session; the zone is looked up instead
+                    continue
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'lookups': self.lookups}
+
+
+tz_resolver = TimezoneResolver()
+
+
+class TimeFormatter:
+    # Zones sharing a UTC offset show the same string, so each tick formats
+    # once per (offset, format, language); the strings live until the next second
+    meridiems = {
+        'fa': ('ق.ظ', 'ب.ظ'),
+        'zh': ('上午', '下午')
+    }
+    digits = {
+        'fa': str.maketrans('0123456789', '۰۱۲۳۴۵۶۷۸۹')
+    }
+
+    def __init__(self):
+        self.second = None
+        self._strings = {}
+        self.hits = 0
+        self.misses = 0
+
+    def format(self, name, now_utc, time_format, lang=None):
+        second = now_utc.replace(microsecond=0)
+        if self.second is None or second > self.second:
+            self.second = second
+            self._strings = {}
+        local = tz_resolver.localize(name, now_utc)
+        if second < self.second:
+            # A late caller must not evict the current second's strings
+            return self.render(local, time_format, lang)
+        key = (local.utcoffset(), time_format, lang)
+        text = self._strings.get(key)
+        if text is None:
+            self.misses += 1
+            text = self._strings[key] = self.render(local, time_format, lang)
+        else:
+            self.hits += 1
+        return text
+
+    def render(self, local, time_format, lang=None):
+        # %p is substituted here: strftime would follow the C locale
+        if '%p' in time_format:
+            time_format = time_format.replace('%p', self.meridiems.get(lang, ('AM', 'PM'))[local.hour >= 12])
+        return self.localize_digits(local.strftime(time_format), lang)
+
+    def localize_digits(self, text, lang):
+        table = self.digits.get(lang)
+        return text.translate(table) if table else text
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+time_formatter = TimeFormatter()
+
+
+class ClockTicker(QObject):
+    # Every listener receives the same UTC instant for a given tick
+    tick = pyqtSignal(object)
+
+    # Fire slightly after the boundary so the new second is already current
+    slack_ms = 5
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.granularity = 'second'
+        self.active = False
+        self.last_second = None
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self.fire)
+
+    def start(self):
+        self.set_active(True)
+
+    def stop(self):
+        self.set_active(False)
+
+    def set_active(self, active):
+        if active == self.active:
+            return
+        self.active = active
+        if active:
+            # Catch up in one step, then realign to the next boundary
+            self.last_second = None
+            self.fire()
+        else:
+            self.timer.stop()
+
+    def set_granularity(self, granularity):
+        if granularity == self.granularity:
+            return
+        self.granularity = granularity
+        if self.active:
+            self.arm(datetime.now(pytz.utc))
+
+    def record_tick(self, now_utc):
+        second = int(now_utc.timestamp())
+        if self.last_second is not None and self.granularity == 'second':
+            metrics.observe('tick_lateness', now_utc.microsecond / 1e6)
+            if second - self.last_second > 1:
+                metrics.increment('missed_seconds', second - self.last_second - 1)
+        self.last_second = second
+
+    def arm(self, now_utc):
+        elapsed_ms = now_utc.microsecond // 1000
+        if self.granularity == 'minute':
+            elapsed_ms += now_utc.second * 1000
+            period_ms = 60000
+        else:
+            period_ms = 1000
+        self.timer.start(period_ms - elapsed_ms + self.slack_ms)
+
+    def fire(self):
+        now_utc = datetime.now(pytz.utc)
+        if metrics.enabled:
+            self.record_tick(now_utc)
+        self.tick.emit(now_utc)
+        if self.active:
+            self.arm(now_utc)
+
+
+class HistoryStore:
+    # One compact JSON record per line; clearing appends a marker that a
+    # background compaction later folds away
+    clear_marker = b'{"op":"clear"}'
+
+    def __init__(self, path='clock_history.jsonl', legacy_path='clock_history.json'):
+        self.path = Path(path)
+        self.legacy_path = Path(legacy_path)
+        self._pending = []
+        self._lock = threading.Lock()
+        self._compactor = None
+
+    def iter_records(self):
+        if not self.path.exists() and self.legacy_path.exists():
+            self.migrate_legacy()
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            start = self.last_clear_offset(f)
+            f.seek(start)
+            for line in f:
+                line = line.strip()
+                if not line or line == self.clear_marker:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A crash between fsyncs can leave a record cut short
+                    continue
+                yield record
+        if start:
+            self.compact_async()
+
+    def last_clear_offset(self, f):
+        offset = 0
+        position = 0
+        for line in f:
+            position += len(line)
+            if line.startswith(self.clear_marker):
+                offset = position
+        return offset
+
+    def migrate_legacy(self):
+        # Written directly so records buffered by the GUI are not swept along
+        with open(self.legacy_path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+        self.legacy_path.replace(self.legacy_path.with_suffix('.json.bak'))
+
+    def append(self, records):
+        self._pending.extend(records)
+
+    def flush(self):
+        if not self._pending:
+            return
+        lines = [json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+                 for record in self._pending]
+        self._pending = []
+        with self._lock:
+            with open(self.path, 'a+b') as f:
+                # Start on a fresh line after a torn tail
+                if f.seek(0, os.SEEK_END):
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        f.write(b'\n')
+                f.write(''.join(lines).encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def clear(self):
+        self._pending = [{'op': 'clear'}]
+        self.flush()
+        self.compact_async()
+
+    def compact_async(self):
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self.compact, daemon=True)
+        self._compactor.start()
+
+    def compact(self):
+        # Copy the live tail without holding the lock, then take the lock only
+        # to append whatever was flushed meanwhile and swap the files
+        tmp_path = self.path.with_suffix('.jsonl.tmp')
+        with self._lock:
+            try:
+                end = self.path.stat().st_size
+            except FileNotFoundError:
+                return
+        with open(self.path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            start = self.last_clear_offset(src)
+            src.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                chunk = src.read(min(remaining, 1 << 20))
+                if not chunk:
+                    break
+                dst.write(chunk)
+                remaining -= len(chunk)
+            with self._lock:
+                src.seek(end)
+                tail = src.read()
+                if self.clear_marker in tail:
+                    tail = tail[tail.rindex(self.clear_marker) + len(self.clear_marker) + 1:]
+                    dst.seek(0)
+                    dst.truncate()
+                dst.write(tail)
+                dst.flush()
+                os.fsync(dst.fileno())
+                os.replace(tmp_path, self.path)
+
+    def close(self):
+        self.flush()
+        if self._compactor is not None:
+            self._compactor.join()
+
+
+class SessionStore:
+    # The board and display settings, rewritten atomically after changes and
+    # read once at startup
+    def __init__(self, path='clock_session.json'):
+        self.path = Path(path)
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                session = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return session if isinstance(session, dict) else None
+
+    def save(self, session):
+        tmp_path = self.path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(session, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+class ConfigWatcher(QObject):
+    # Emits a declarative board config once a burst of writes has settled.
+    # The directory is watched as well because atomic replaces (editors,
+    # deploy tools) drop the file itself from QFileSystemWatcher.
+    changed = pyqtSignal(dict)
+    failed = pyqtSignal(str)
+
+    debounce_ms = 300
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.path = Path(path).resolve()
+        self.last_text = None
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.addPath(str(self.path.parent))
+        self.watcher.fileChanged.connect(self.schedule)
+        self.watcher.directoryChanged.connect(self.schedule)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.debounce_ms)
+        self.timer.timeout.connect(self.reload)
+
+    def schedule(self, path=None):
+        self.timer.start()
+
+    def reload(self):
+        if self.path.exists() and str(self.path) not in self.watcher.files():
+            self.watcher.addPath(str(self.path))
+        try:
+            text = self.path.read_text(encoding='utf-8')
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            self.failed.emit(str(e))
+            return
+        if text == self.last_text:
+            return
+        try:
+            config = json.loads(text)
+        except ValueError as e:
+            self.failed.emit('%s: %s' % (self.path.name, e))
+            return
+        if not isinstance(config, dict):
+            self.failed.emit('%s: expected a JSON object' % self.path.name)
+            return
+        self.last_text = text
+        self.changed.emit(config)
+
+
+class HistoryAction(IntEnum):
+    ADDED = 0
+    REMOVED = 1
+    UPDATED = 2
+
+    @property
+    def label(self):
+        return self.name.capitalize()
+
+    @property
+    def text_key(self):
+        return 'action_' + self.name.lower()
+
+    @classmethod
+    def from_label(cls, label):
+        return cls[label.upper()]
+
+
+class HistoryLog:
+    # Columnar history: epoch seconds, interned zone ids and action codes.
+    # Display strings are produced on demand in the current format/language.
+    # Rows are events for the zone acted on only; the full board at any
+    # instant is rebuilt from the nearest checkpoint plus the events after it.
+    __slots__ = ('epochs', 'zone_ids', 'actions', 'zones', '_zone_index',
+                 '_rows_by_key', 'monotonic', 'checkpoint_epochs',
+                 'checkpoint_rows', 'checkpoint_zones')
+
+    # Events between board checkpoints, i.e. the most a snapshot replays
+    checkpoint_interval = 64
+
+    def __init__(self):
+        self.epochs = array('q')
+        self.zone_ids = array('H')
+        self.actions = array('B')
+        self.zones = []
+        self._zone_index = {}
+        # (zone id, action) -> ascending row numbers
+        self._rows_by_key = {}
+        # While epochs never decrease, time ranges map to row ranges by bisection
+        self.monotonic = True
+        # Checkpoint k holds the board after the first checkpoint_rows[k] events
+        self.checkpoint_epochs = array('q')
+        self.checkpoint_rows = array('L')
+        self.checkpoint_zones = []
+
+    def __len__(self):
+        return len(self.epochs)
+
+    def intern(self, zone):
+        zone_id = self._zone_index.get(zone)
+        if zone_id is None:
+            zone_id = len(self.zones)
+            self.zones.append(zone)
+            self._zone_index[zone] = zone_id
+        return zone_id
+
+    def append(self, epoch, zone, action):
+        row = len(self.epochs)
+        if row and epoch < self.epochs[-1]:
+            self.monotonic = False
+        zone_id = self.intern(zone)
+        self.epochs.append(epoch)
+        self.zone_ids.append(zone_id)
+        self.actions.append(action)
+        rows = self._rows_by_key.get((zone_id, action))
+        if rows is None:
+            rows = self._rows_by_key[(zone_id, action)] = array('L')
+        rows.append(row)
+
+    def append_record(self, record):
+        # Accepts both the compact {"e", "z", "a"} form and legacy display dicts
+        if record.get('op') == 'checkpoint':
+            self.add_checkpoint(record['e'], record['zones'])
+            return
+        if 'e' in record:
+            epoch = record['e']
+            zone = record['z']
+        else:
+            epoch = int(datetime.strptime(record['date'], "%Y-%m-%d %H:%M:%S").timestamp())
+            zone = record['timezone']
+        action = record.get('a', record.get('action'))
+        self.append(epoch, zone, HistoryAction.from_label(action))
+
+    def extend(self, other):
+        offset = len(self.epochs)
+        for i in range(len(other)):
+            self.append(*other.row(i))
+        for epoch, row, zone_ids in zip(other.checkpoint_epochs, other.checkpoint_rows, other.checkpoint_zones):
+            self.checkpoint_epochs.append(epoch)
+            self.checkpoint_rows.append(row + offset)
+            self.checkpoint_zones.append(array('H', [self.intern(other.zones[z]) for z in zone_ids]))
+
+    def needs_checkpoint(self):
+        return (not self.checkpoint_rows
+                or len(self.epochs) - self.checkpoint_rows[-1] >= self.checkpoint_interval)
+
+    def add_checkpoint(self, epoch, zones):
+        self.checkpoint_epochs.append(epoch)
+        self.checkpoint_rows.append(len(self.epochs))
+        self.checkpoint_zones.append(array('H', [self.intern(zone) for zone in zones]))
+
+    def snapshot_at(self, epoch):
+        # Zones on the board as of epoch, in board order. Instants before the
+        # first checkpoint only reflect the events recorded since then.
+        if self.monotonic:
+            end = bisect_right(self.epochs, epoch)
+        else:
+            end = max((i + 1 for i, e in enumerate(self.epochs) if e <= epoch), default=0)
+        k = bisect_right(self.checkpoint_rows, end) - 1
+        if k >= 0:
+            start = self.checkpoint_rows[k]
+            zones = [self.zones[zone_id] for zone_id in self.checkpoint_zones[k]]
+        else:
+            start = 0
+            zones = []
+        for row in range(start, end):
+            zone = self.zones[self.zone_ids[row]]
+            if self.actions[row] == HistoryAction.REMOVED:
+                if zone in zones:
+                    zones.remove(zone)
+            elif zone not in zones:
+                # Added, or a legacy "Updated" row for a zone already shown
+                zones.append(zone)
+        return zones
+
+    def row(self, i):
+        return self.epochs[i], self.zones[self.zone_ids[i]], HistoryAction(self.actions[i])
+
+    def record(self, i):
+        epoch, zone, action = self.row(i)
+        return {'e': epoch, 'z': zone, 'a': action.label}
+
+    def format_row(self, i, time_format, lang=None):
+        epoch, zone, action = self.row(i)
+        instant = datetime.fromtimestamp(epoch, pytz.utc)
+        return (epoch,
+                time_formatter.render(tz_resolver.convert(zone, instant), time_format, lang),
+                zone,
+                time_formatter.localize_digits(instant.astimezone().strftime("%Y-%m-%d %H:%M:%S"), lang),
+                action)
+
+    def iter_records(self):
+        for i in range(len(self)):
+            yield self.record(i)
+
+    def match_zones(self, pattern):
+        # Globs such as "Europe/*" match whole names; plain text matches anywhere
+        pattern = pattern.lower()
+        if not any(c in pattern for c in '*?['):
+            pattern = '*' + pattern + '*'
+        return [zone_id for zone_id, zone in enumerate(self.zones) if fnmatchcase(zone.lower(), pattern)]
+
+    def query(self, zone_pattern=None, action=None, since=None, until=None):
+        # Ascending row numbers matching every given filter. Only the index
+        # lists of matching (zone, action) keys are touched, each cut down to
+        # the time window by bisection.
+        if zone_pattern:
+            zone_ids = self.match_zones(zone_pattern)
+        else:
+            zone_ids = range(len(self.zones))
+        actions = list(HistoryAction) if action is None else [action]
+
+        lo, hi = 0, len(self.epochs)
+        if self.monotonic:
+            if since is not None:
+                lo = bisect_left(self.epochs, since)
+            if until is not None:
+                hi = bisect_left(self.epochs, until)
+
+        slices = []
+        for zone_id in zone_ids:
+            for act in actions:
+                rows = self._rows_by_key.get((zone_id, act))
+                if rows:
+                    slices.append(rows[bisect_left(rows, lo):bisect_left(rows, hi)])
+        result = list(merge(*slices)) if len(slices) > 1 else list(slices[0]) if slices else []
+        if not self.monotonic and (since is not None or until is not None):
+            result = [row for row in result if self.in_range(row, since, until)]
+        return result
+
+    def in_range(self, row, since, until):
+        epoch = self.epochs[row]
+        return (since is None or epoch >= since) and (until is None or epoch < until)
+
+    def matches(self, row, zone_pattern=None, action=None, since=None, until=None):
+        if action is not None and self.actions[row] != action:
+            return False
+        if zone_pattern and self.zone_ids[row] not in self.match_zones(zone_pattern):
+            return False
+        return self.in_range(row, since, until)
+
+
+class HistoryLoader(QThread):
+    loaded = pyqtSignal(object)
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        # Set when the history is cleared mid-load; the result is then dropped
+        self.stale = False
+
+    def run(self):
+        history = HistoryLog()
+        try:
+            for record in self.store.iter_records():
+                try:
+                    history.append_record(record)
+                except (AttributeError, KeyError, TypeError, ValueError):
+                    # Unknown actions or malformed records are skipped
+                    continue
+        except (OSError, ValueError) as e:
+            print('history: cannot read %s: %s' % (self.store.path, e), file=sys.stderr)
+        self.loaded.emit(history)
+
+
+class HistoryExportWorker(QThread):
+    progress = pyqtSignal(int, int)
+    failed = pyqtSignal(str)
+
+    fields = ['epoch', 'time', 'timezone', 'date', 'action']
+    chunk_size = 2000
+
+    def __init__(self, history, rows, time_format, path, parent=None):
+        super().__init__(parent)
+        # rows is a snapshot so entries appended during the export are left out
+        self.history = history
+        self.rows = rows
+        self.time_format = time_format
+        self.path = path
+        self.cancelled = False
+        self.error = None
+
+    def cancel(self):
+        self.cancelled = True
+
+    def open_output(self):
+        if self.path.endswith('.gz'):
+            return gzip.open(self.path, 'wt', encoding='utf-8', newline='')
+        return open(self.path, 'w', encoding='utf-8', newline='')
+
+    def run(self):
+        name = self.path[:-3] if self.path.endswith('.gz') else self.path
+        kind = 'csv' if name.endswith('.csv') else 'json' if name.endswith('.json') else 'jsonl'
+        total = len(self.rows)
+        try:
+            with self.open_output() as f:
+                writer = csv.writer(f) if kind == 'csv' else None
+                if writer:
+                    writer.writerow(self.fields)
+                elif kind == 'json':
+                    f.write('[\n')
+                for start in range(0, total, self.chunk_size):
+                    if self.cancelled:
+                        break
+                    chunk = []
+                    for row in self.rows[start:start + self.chunk_size]:
+                        epoch, time_str, zone, date, action = self.history.format_row(row, self.time_format)
+                        chunk.append((epoch, time_str, zone, date, action.label))
+                    if writer:
+                        writer.writerows(chunk)
+                    else:
+                        lines = [json.dumps(dict(zip(self.fields, values)), ensure_ascii=False) for values in chunk]
+                        if kind == 'json':
+                            f.write((',\n' if start else '') + ',\n'.join(lines))
+                        else:
+                            f.write('\n'.join(lines) + '\n')
+                    self.progress.emit(min(start + self.chunk_size, total), total)
+                if kind == 'json':
+                    f.write('\n]\n')
+        except OSError as e:
+            self.error = str(e)
+        if self.cancelled or self.error is not None:
+            try:
+                Path(self.path).unlink(missing_ok=True)
+            except OSError:
+                pass
+        if self.error is not None:
+            self.failed.emit(self.error)
+
+
+class HistoryModel(QAbstractTableModel):
+    header_keys = ['history_time', 'history_timezone', 'history_date', 'history_action']
+    cache_limit = 4096
+
+    def __init__(self, texts, history, parent=None):
+        super().__init__(parent)
+        self.texts = texts
+        self.history = history
+        self.lang = 'en'
+        self.time_format = "%H:%M:%S"
+        self._row_cache = {}
+        self.filter = {}
+        # Source rows shown when a filter is active, None while showing everything
+        self.rows = None
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.history) if self.rows is None else len(self.rows)
+
+    def source_row(self, row):
+        return row if self.rows is None else self.rows[row]
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.header_keys)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.display_row(index.row())[index.column()]
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return self.alignment()
+        return None
+
+    def display_row(self, row):
+        row = self.source_row(row)
+        cached = self._row_cache.get(row)
+        if cached is None:
+            if len(self._row_cache) >= self.cache_limit:
+                self._row_cache.clear()
+            _, time_str, zone, date, action = self.history.format_row(row, self.time_format, self.lang)
+            cached = (time_str, zone, date, self.texts[self.lang][action.text_key])
+            self._row_cache[row] = cached
+        return cached
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation != Qt.Orientation.Horizontal:
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.texts[self.lang][self.header_keys[section]]
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return self.alignment()
+        return None
+
+    def alignment(self):
+        horizontal = Qt.AlignmentFlag.AlignRight if self.lang == 'fa' else Qt.AlignmentFlag.AlignLeft
+        return horizontal | Qt.AlignmentFlag.AlignVCenter
+
+    def set_language(self, lang):
+        self.lang = lang
+        self._row_cache.clear()
+        self.headerDataChanged.emit(Qt.Orientation.Horizontal, 0, len(self.header_keys) - 1)
+
+    def set_time_format(self, time_format):
+        if time_format == self.time_format:
+            return
+        self.time_format = time_format
+        self._row_cache.clear()
+        count = self.rowCount()
+        if count:
+            self.dataChanged.emit(self.index(0, 0), self.index(count - 1, 0))
+
+    def append_rows(self, rows):
+        if not rows:
+            return
+        if self.rows is None:
+            first = len(self.history)
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            for epoch, zone, action in rows:
+                self.history.append(epoch, zone, action)
+            self.endInsertRows()
+            return
+
+        for epoch, zone, action in rows:
+            self.history.append(epoch, zone, action)
+            source = len(self.history) - 1
+            if self.history.matches(source, **self.filter):
+                first = len(self.rows)
+                self.beginInsertRows(QModelIndex(), first, first)
+                self.rows.append(source)
+                self.endInsertRows()
+
+    def set_filter(self, **query):
+        self.beginResetModel()
+        self.filter = {key: value for key, value in query.items() if value is not None and value != ''}
+        self.rows = self.history.query(**self.filter) if self.filter else None
+        self.endResetModel()
+
+    def set_history(self, history):
+        self.history = history
+        self._row_cache.clear()
+        self.set_filter(**self.filter)
+
+
+class TimezoneIndex:
+    # Common names for zones whose city part is not what people type
+    aliases = {
+        'nyc': 'America/New_York', 'washington': 'America/New_York', 'boston': 'America/New_York',
+        'la': 'America/Los_Angeles', 'sf': 'America/Los_Angeles', 'san francisco': 'America/Los_Angeles',
+        'seattle': 'America/Los_Angeles', 'dallas': 'America/Chicago', 'houston': 'America/Chicago',
+        'beijing': 'Asia/Shanghai', 'peking': 'Asia/Shanghai', 'shenzhen': 'Asia/Shanghai',
+        'mumbai': 'Asia/Kolkata', 'bombay': 'Asia/Kolkata', 'delhi': 'Asia/Kolkata',
+        'new delhi': 'Asia/Kolkata', 'bangalore': 'Asia/Kolkata', 'calcutta': 'Asia/Kolkata',
+        'saigon': 'Asia/Ho_Chi_Minh', 'rangoon': 'Asia/Yangon', 'kiev': 'Europe/Kyiv',
+        'mashhad': 'Asia/Tehran', 'isfahan': 'Asia/Tehran', 'shiraz': 'Asia/Tehran',
+        'abu dhabi': 'Asia/Dubai', 'geneva': 'Europe/Zurich', 'munich': 'Europe/Berlin',
+        'frankfurt': 'Europe/Berlin', 'milan': 'Europe/Rome', 'st petersburg': 'Europe/Moscow'
+    }
+    # Sign, hours, then minutes after a colon (possibly still being typed) or
+    # as two trailing digits
+    offset_pattern = re.compile(r'([+-])(\d{1,2})(?::(\d{0,2})|(\d{2}))?')
+
+    def __init__(self):
+        self.names = None
+        self.offsets = None
+
+    def load(self):
+        # Names, cities and country aliases are built on first use only
+        if self.names is not None:
+            return
+        self.names = list(pytz.common_timezones)
+        self._lower = {name.lower(): name for name in self.names}
+        self._keys = []
+        for name in self.names:
+            city = name.rsplit('/', 1)[-1].replace('_', ' ').lower()
+            self._keys.append((name, name.lower(), city))
+        known = set(self.names)
+        self._aliases = {}
+        for alias, name in self.aliases.items():
+            if name in known:
+                self._aliases.setdefault(alias, []).append(name)
+        for code, country in pytz.country_names.items():
+            for name in pytz.country_timezones.get(code, []):
+                if name in known:
+                    self._aliases.setdefault(country.lower(), []).append(name)
+
+    def load_offsets(self):
+        if self.offsets is not None:
+            return
+        now_utc = datetime.now(pytz.utc)
+        self.offsets = {}
+        for name in self.names:
+            offset = tz_resolver.convert(name, now_utc).utcoffset()
+            self.offsets[name] = 'utc' + format_offset(int(offset.total_seconds()))
+
+    def offset_query(self, query):
+        # "+3:30", "utc-5", "gmt+0530" -> normalized "utc+03:30"; None for plain text
+        text = query.replace(' ', '')
+        for prefix in ('utc', 'gmt'):
+            if text.startswith(prefix):
+                text = text[len(prefix):]
+        match = self.offset_pattern.fullmatch(text)
+        if match is None:
+            return None
+        sign, hours, minutes, digits = match.groups()
+        return 'utc%s%02d:%02d' % (sign, int(hours), int(minutes or digits or 0))
+
+    def search(self, query, limit=50):
+        self.load()
+        query = query.strip().lower()
+        if not query:
+            return self.names[:limit]
+
+        offset = self.offset_query(query)
+        if offset is not None:
+            self.load_offsets()
+            return [name for name in self.names if self.offsets[name] == offset][:limit]
+
+        ranked = {}
+        for name, lower, city in self._keys:
+            if lower == query or city == query:
+                rank = 0
+            elif city.startswith(query):
+                rank = 1
+            elif lower.startswith(query) or ('/' + query) in lower:
+                rank = 2
+            elif query in city or query in lower:
+                rank = 4
+            else:
+                continue
+            ranked[name] = rank
+        for alias, names in self._aliases.items():
+            if alias == query or alias.startswith(query):
+                rank = 0 if alias == query else 3
+                for name in names:
+                    if ranked.get(name, 5) > rank:
+                        ranked[name] = rank
+        return sorted(ranked, key=lambda name: (ranked[name], name))[:limit]
+
+    def resolve(self, text):
+        self.load()
+        name = self._lower.get(text.strip().lower())
+        if name is not None:
+            return name
+        # Otherwise only an unambiguous city or alias resolves
+        query = text.strip().lower()
+        if len(self._aliases.get(query, [])) == 1:
+            return self._aliases[query][0]
+        cities = [name for name, _, city in self._keys if city == query]
+        return cities[0] if len(cities) == 1 else None
+
+
+class TimezonePicker(QComboBox):
+    # Editable combo that fills its list on first open and ranks typed matches
+    def __init__(self, index, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.loaded = False
+        self.setEditable(True)
+        self.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
+        self.matches = QStringListModel(self)
+        self.completer_popup = QCompleter(self.matches, self)
+        self.completer_popup.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.completer_popup.setMaxVisibleItems(12)
+        self.setCompleter(self.completer_popup)
+        self.lineEdit().textEdited.connect(self.update_matches)
+
+    def showPopup(self):
+        if not self.loaded:
+            text = self.currentText()
+            self.index.load()
+            self.addItems(self.index.names)
+            self.setCurrentText(text)
+            self.loaded = True
+        super().showPopup()
+
+    def update_matches(self, text):
+        self.matches.setStringList(self.index.search(text) if text else [])
+        if text:
+            self.completer_popup.complete()
+
+
+_dial_cache = {}
+
+
+def render_dial(width, height, dpr, theme_name, colors):
+    # Face and markers never change between ticks, so they are rendered once
+    # per (size, device pixel ratio, theme) and shared by every clock
+    key = (width, height, dpr, theme_name)
+    pixmap = _dial_cache.get(key)
+    if pixmap is not None:
+        return pixmap
+    if len(_dial_cache) >= 32:
+        _dial_cache.clear()
+
+    pixmap = QPixmap(int(width * dpr), int(height * dpr))
+    pixmap.setDevicePixelRatio(dpr)
+    pixmap.fill(Qt.GlobalColor.transparent)
+    painter = QPainter(pixmap)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    size = min(width, height)
+    center = QRect(0, 0, width, height).center()
+    radius = size // 2 - 15
+
+    # Draw clock face
+    painter.setPen(QPen(colors['ink'], 2))
+    painter.setBrush(QBrush(colors['face']))
+    painter.drawEllipse(center, radius, radius)
+
+    # Draw hour markers
+    for i in range(12):
+        angle = i * 30 * math.pi / 180
+        x1 = center.x() + (radius - 8) * math.cos(angle)
+        y1 = center.y() + (radius - 8) * math.sin(angle)
+        x2 = center.x() + radius * math.cos(angle)
+        y2 = center.y() + radius * math.sin(angle)
+        painter.drawLine(int(x1), int(y1), int(x2), int(y2))
+
+    # Draw minute markers
+    for i in range(60):
+        if i % 5 != 0:
+            angle = i * 6 * math.pi / 180
+            x1 = center.x() + (radius - 4) * math.cos(angle)
+            y1 = center.y() + (radius - 4) * math.sin(angle)
+            x2 = center.x() + radius * math.cos(angle)
+            y2 = center.y() + radius * math.sin(angle)
+            painter.drawLine(int(x1), int(y1), int(x2), int(y2))
+    painter.end()
+
+    _dial_cache[key] = pixmap
+    return pixmap
+
+
+def clock_hands(center_x, center_y, radius, time, smooth=False):
+    # Hour, minute and second hands as QLines from the center; smooth places
+    # the second hand between ticks using the sub-second part of time
+    hour = time.hour % 12 + time.minute / 60
+    hour_angle = (hour * 30) * math.pi / 180
+    hour_x = center_x + (radius - 40) * math.cos(hour_angle)
+    hour_y = center_y + (radius - 40) * math.sin(hour_angle)
+
+    minute = time.minute + time.second / 60
+    minute_angle = minute * 6 * math.pi / 180
+    minute_x = center_x + (radius - 25) * math.cos(minute_angle)
+    minute_y = center_y + (radius - 25) * math.sin(minute_angle)
+
+    second = time.second + time.microsecond / 1e6 if smooth else time.second
+    second_angle = second * 6 * math.pi / 180
+    second_x = center_x + (radius - 15) * math.cos(second_angle)
+    second_y = center_y + (radius - 15) * math.sin(second_angle)
+
+    return (QLine(center_x, center_y, int(hour_x), int(hour_y)),
+            QLine(center_x, center_y, int(minute_x), int(minute_y)),
+            QLine(center_x, center_y, int(second_x), int(second_y)))
+
+
+# Pen widths of the hour, minute and second hands
+hand_widths = (5, 3, 2)
+
+
+def line_rect(line, width):
+    # A square cap reaches width / 2 * sqrt(2) past a diagonal endpoint, plus
+    # a pixel or two of antialiasing
+    pad = math.ceil(width * math.sqrt(2) / 2) + 2
+    return QRect(line.p1(), line.p2()).normalized().adjusted(-pad, -pad, pad, pad)
+
+
+def dirty_hands_rect(painted, hands):
+    # Union of the old and new extent of every hand that moved; a null rect
+    # means nothing visible changed
+    if painted is None or len(painted) != len(hands):
+        return None
+    dirty = QRect()
+    for old, new, width in zip(painted, hands, hand_widths):
+        if old != new:
+            dirty = dirty.united(line_rect(old, width)).united(line_rect(new, width))
+    return dirty
+
+
+class SweepAnimator(QObject):
+    # Frame clock for the sweeping second hand. Each tick anchors the wall
+    # time to the monotonic clock; frames extrapolate from that anchor so the
+    # hand never jumps when the wall clock is adjusted between ticks.
+    frame = pyqtSignal(object)
+    fps = 30
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.anchor = None
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self.step)
+
+    def set_fps(self, fps):
+        self.fps = max(1, fps)
+        if self.timer.isActive():
+            self.timer.start(1000 // self.fps)
+
+    def set_active(self, active):
+        if active and not self.timer.isActive():
+            self.sync(datetime.now(pytz.utc))
+            self.timer.start(1000 // self.fps)
+        elif not active:
+            self.timer.stop()
+            self.anchor = None
+
+    def sync(self, now_utc):
+        self.anchor = (now_utc, time.monotonic())
+
+    def step(self):
+        if self.anchor is None:
+            return
+        wall, monotonic = self.anchor
+        # Never run more than one second ahead of the last tick
+        elapsed = min(time.monotonic() - monotonic, 1.0)
+        self.frame.emit(wall + timedelta(seconds=elapsed))
+
+
 class ClockWidget(QWidget):
+    default_colors = {
+        'face': QColor(255, 255, 255),
+        'ink': QColor(0, 0, 0),
+        'second': QColor(200, 0, 0)
+    }
+
     def __init__(self, timezone, parent=None):
         super().__init__(parent)
         self.setMinimumSize(200, 200)
         self.time = datetime.now()
-        self.timezone = pytz.timezone(timezone)
+        self.timezone = timezone
+        self.theme_name = None
+        self.colors = self.default_colors
+        self.show_seconds = True
+        self.sweep = False
+        self.hands = None
 
     def set_timezone(self, timezone):
-        self.timezone = pytz.timezone(timezone)
+        self.timezone = timezone
+        self.update()
+
+    def set_theme(self, theme_name, colors):
+        if theme_name == self.theme_name:
+            return
+        self.theme_name = theme_name
+        self.colors = colors
         self.update()
 
-    def update_time(self):
-        self.time = datetime.now(self.timezone)
+    def set_show_seconds(self, show_seconds):
+        self.show_seconds = show_seconds
         self.update()
 
+    def set_sweep(self, sweep):
+        self.sweep = sweep
+        self.update()
+
+    def update_time(self, now_utc=None):
+        if now_utc is None:
+            now_utc = datetime.now(pytz.utc)
+        self.time = tz_resolver.localize(self.timezone, now_utc)
+        self.refresh_hands()
+
+    def sweep_to(self, now_utc):
+        self.time = tz_resolver.localize(self.timezone, now_utc)
+        self.refresh_hands()
+
+    def hand_geometry(self):
+        center = self.rect().center()
+        return center.x(), center.y(), min(self.width(), self.height()) // 2 - 15
+
+    def visible_hands(self):
+        hands = clock_hands(*self.hand_geometry(), self.time, self.sweep)
+        return hands if self.show_seconds else hands[:2]
+
+    def refresh_hands(self):
+        # Hidden clocks are repainted from self.time when they are exposed again
+        if self.visibleRegion().isEmpty():
+            return
+        dirty = dirty_hands_rect(self.hands, self.visible_hands())
+        if dirty is None:
+            self.update()
+        elif not dirty.isNull():
+            self.update(dirty)
+
     def paintEvent(self, event):
+        started = metrics.start()
         painter = QPainter(self)
+        self.paint_clock(painter)
+        painter.end()
+        metrics.stop('paint', started)
+
+    def paint_clock(self, painter):
+        dial = render_dial(self.width(), self.height(), self.devicePixelRatioF(),
+                           self.theme_name, self.colors)
+        painter.drawPixmap(0, 0, dial)
+
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        size = min(self.width(), self.height())
-        center = self.rect().center()
-        radius = size // 2 - 15
-
-        # Draw clock face
-        painter.setPen(QPen(QColor(0, 0, 0), 2))
-        painter.setBrush(QBrush(QColor(255, 255, 255)))
-        painter.drawEllipse(center, radius, radius)
-
-        # Draw hour markers
-        for i in range(12):
-            angle = i * 30 * math.pi / 180
-            x1 = center.x() + (radius - 8) * math.cos(angle)
-            y1 = center.y() + (radius - 8) * math.sin(angle)
-            x2 = center.x() + radius * math.cos(angle)
-            y2 = center.y() + radius * math.sin(angle)
-            painter.drawLine(int(x1), int(y1), int(x2), int(y2))
+        self.hands = self.visible_hands()
+
+        painter.setPen(QPen(self.colors['ink'], hand_widths[0]))
+        painter.drawLine(self.hands[0])
+        painter.setPen(QPen(self.colors['ink'], hand_widths[1]))
+        painter.drawLine(self.hands[1])
+        if self.show_seconds:
+            painter.setPen(QPen(self.colors['second'], hand_widths[2]))
+            painter.drawLine(self.hands[2])
+
+
+class CanvasTile:
+    # Stands in for a ClockWidget inside a ClockCanvas
+    __slots__ = ('canvas', 'index', 'timezone', 'time', 'hands')
+
+    def __init__(self, canvas, timezone):
+        self.canvas = canvas
+        self.index = 0
+        self.timezone = timezone
+        self.time = datetime.now()
+        self.hands = None
+
+    def set_timezone(self, timezone):
+        self.timezone = timezone
+        self.hands = None
+        self.canvas.update_tile(self)
+
+    def set_theme(self, theme_name, colors):
+        self.canvas.set_theme(theme_name, colors)
+
+    def set_show_seconds(self, show_seconds):
+        self.canvas.set_show_seconds(show_seconds)
+
+    def set_sweep(self, sweep):
+        self.canvas.set_sweep(sweep)
+
+    def update_time(self, now_utc=None):
+        if now_utc is None:
+            now_utc = datetime.now(pytz.utc)
+        self.time = tz_resolver.localize(self.timezone, now_utc)
+        self.canvas.refresh_tile(self)
+
+
+class ClockCanvas(QWidget):
+    # Draws every analog clock in one widget: a tiled grid, one painter pass,
+    # the shared cached dial per tile and the hands batched per pen
+    tile_size = 200
+    label_height = 24
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tiles = []
+        self.columns = 2
+        self.theme_name = None
+        self.colors = ClockWidget.default_colors
+        self.show_seconds = True
+        self.sweep = False
+        self.setMinimumSize(self.tile_size, self.tile_size + self.label_height)
+
+    def insert_tile(self, index, timezone):
+        tile = CanvasTile(self, timezone)
+        self.tiles.insert(index, tile)
+        self.relayout()
+        return tile
+
+    def remove_tile(self, tile):
+        self.tiles.remove(tile)
+        self.relayout()
+
+    def move_tile(self, tile, index):
+        self.tiles.remove(tile)
+        self.tiles.insert(index, tile)
+        self.relayout()
+
+    def set_theme(self, theme_name, colors):
+        if theme_name == self.theme_name:
+            return
+        self.theme_name = theme_name
+        self.colors = colors
+        self.update()
+
+    def set_show_seconds(self, show_seconds):
+        if show_seconds == self.show_seconds:
+            return
+        self.show_seconds = show_seconds
+        for tile in self.tiles:
+            tile.hands = None
+        self.update()
+
+    def set_sweep(self, sweep):
+        if sweep == self.sweep:
+            return
+        self.sweep = sweep
+        self.update()
+
+    def tile_face(self, index):
+        rect = self.tile_rect(index)
+        return QRect(rect.x() + (rect.width() - self.tile_size) // 2, rect.y(), self.tile_size, self.tile_size)
+
+    def tile_center(self, index):
+        center = self.tile_face(index).center()
+        return center.x(), center.y(), self.tile_size // 2 - 15
+
+    def tile_hands(self, tile):
+        hands = clock_hands(*self.tile_center(tile.index), tile.time, self.sweep)
+        return hands if self.show_seconds else hands[:2]
+
+    def sweep_to(self, now_utc):
+        visible = self.visibleRegion()
+        for tile in self.tiles:
+            tile.time = tz_resolver.localize(tile.timezone, now_utc)
+            self.refresh_tile(tile, visible)
+
+    def relayout(self):
+        for index, tile in enumerate(self.tiles):
+            tile.index = index
+        self.columns = max(1, self.width() // self.tile_size)
+        rows = (len(self.tiles) + self.columns - 1) // self.columns
+        self.setMinimumHeight(max(1, rows) * (self.tile_size + self.label_height))
+        self.update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if max(1, self.width() // self.tile_size) != self.columns:
+            self.relayout()
+
+    def tile_rect(self, index):
+        width = self.width() // self.columns
+        row, col = divmod(index, self.columns)
+        return QRect(col * width, row * (self.tile_size + self.label_height),
+                     width, self.tile_size + self.label_height)
+
+    def update_tile(self, tile):
+        self.update(self.tile_rect(tile.index))
+
+    def refresh_tile(self, tile, visible=None):
+        # Only the moved hands of tiles on screen are invalidated
+        if visible is None:
+            visible = self.visibleRegion()
+        if not visible.intersects(self.tile_rect(tile.index)):
+            return
+        dirty = dirty_hands_rect(tile.hands, self.tile_hands(tile))
+        if dirty is None:
+            self.update_tile(tile)
+        elif not dirty.isNull():
+            self.update(dirty)
+
+    def paintEvent(self, event):
+        started = metrics.start()
+        painter = QPainter(self)
+        region = event.region()
+        hour_lines, minute_lines, second_lines = [], [], []
+        dpr = self.devicePixelRatioF()
+        painter.setPen(self.colors['ink'])
+        painter.setFont(QFont("Segoe UI", 10))
+        for index, tile in enumerate(self.tiles):
+            rect = self.tile_rect(index)
+            if not region.intersects(rect):
+                continue
+            face = self.tile_face(index)
+            painter.drawPixmap(face.topLeft(), render_dial(self.tile_size, self.tile_size, dpr,
+                                                           self.theme_name, self.colors))
+            painter.drawText(QRect(rect.x(), face.bottom(), rect.width(), self.label_height),
+                             Qt.AlignmentFlag.AlignCenter, tile.timezone)
+            tile.hands = self.tile_hands(tile)
+            hour_lines.append(tile.hands[0])
+            minute_lines.append(tile.hands[1])
+            if self.show_seconds:
+                second_lines.append(tile.hands[2])
+
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(QPen(self.colors['ink'], hand_widths[0]))
+        painter.drawLines(hour_lines)
+        painter.setPen(QPen(self.colors['ink'], hand_widths[1]))
+        painter.drawLines(minute_lines)
+        if self.show_seconds:
+            painter.setPen(QPen(self.colors['second'], hand_widths[2]))
+            painter.drawLines(second_lines)
+        painter.end()
+        metrics.stop('paint', started)
+
+
+class TranslationCatalog:
+    # Maps a language to its strings, loaded lazily from one JSON file per
+    # language; keys missing from a translation fall back to English
+    def __init__(self, directory=None):
+        self.directory = Path(directory) if directory else Path(__file__).with_name('translations')
+        self._catalogs = {}
+
+    def __getitem__(self, lang):
+        catalog = self._catalogs.get(lang)
+        if catalog is None:
+            catalog = self._catalogs[lang] = self.load(lang)
+        return catalog
+
+    def load(self, lang):
+        with open(self.directory / f'{lang}.json', 'r', encoding='utf-8') as f:
+            strings = json.load(f)
+        if lang != 'en':
+            strings = {**self['en'], **strings}
+        return strings
 
-        # Draw minute markers
-        for i in range(60):
-            if i % 5 != 0:
-                angle = i * 6 * math.pi / 180
-                x1 = center.x() + (radius - 4) * math.cos(angle)
-                y1 = center.y() + (radius - 4) * math.sin(angle)
-                x2 = center.x() + radius * math.cos(angle)
-                y2 = center.y() + radius * math.sin(angle)
-                painter.drawLine(int(x1), int(y1), int(x2), int(y2))
-
-        # Draw hour hand
-        hour = self.time.hour % 12 + self.time.minute / 60
-        hour_angle = (hour * 30) * math.pi / 180
-        hour_x = center.x() + (radius - 40) * math.cos(hour_angle)
-        hour_y = center.y() + (radius - 40) * math.sin(hour_angle)
-        painter.setPen(QPen(QColor(0, 0, 0), 5))
-        painter.drawLine(center.x(), center.y(), int(hour_x), int(hour_y))
-
-        # Draw minute hand
-        minute = self.time.minute + self.time.second / 60
-        minute_angle = minute * 6 * math.pi / 180
-        minute_x = center.x() + (radius - 25) * math.cos(minute_angle)
-        minute_y = center.y() + (radius - 25) * math.sin(minute_angle)
-        painter.setPen(QPen(QColor(0, 0, 0), 3))
-        painter.drawLine(center.x(), center.y(), int(minute_x), int(minute_y))
-
-        # Draw second hand
-        second = self.time.second
-        second_angle = second * 6 * math.pi / 180
-        second_x = center.x() + (radius - 15) * math.cos(second_angle)
-        second_y = center.y() + (radius - 15) * math.sin(second_angle)
-        painter.setPen(QPen(QColor(200, 0, 0), 2))
-        painter.drawLine(center.x(), center.y(), int(second_x), int(second_y))
 
 class DigitalClock(QMainWindow):
-    def __init__(self):
+    languages = ['en', 'fa', 'zh', 'ru']
+    theme_names = ['Windows', 'Dark', 'Red', 'Blue']
+
+    # (text key, seconds back from now) for the history time-range filter
+    history_ranges = [
+        ('filter_all_time', None),
+        ('filter_last_hour', 3600),
+        ('filter_last_day', 86400),
+        ('filter_last_week', 7 * 86400)
+    ]
+
+    # Set once on the window; widgets are told apart by type, object name
+    # or the "role" property instead of carrying their own style sheets
+    stylesheet = """
+        QTabWidget::pane {
+            border: 1px solid rgba(0, 0, 0, 0.1);
+            border-radius: 8px;
+            background: rgba(255, 255, 255, 0.95);
+        }
+        QTabBar::tab {
+            padding: 10px 20px;
+            margin-right: 5px;
+            border-top-left-radius: 8px;
+            border-top-right-radius: 8px;
+            background: rgba(0, 0, 0, 0.05);
+            color: black;
+        }
+        QTabBar::tab:selected {
+            background: rgba(0, 120, 212, 0.3);
+            font-weight: bold;
+            color: black;
+        }
+        QLineEdit, QComboBox {
+            border-radius: 8px;
+            padding: 8px;
+            font-size: 14px;
+            border: 1px solid rgba(0, 0, 0, 0.2);
+            background: rgba(255, 255, 255, 0.95);
+            color: black;
+        }
+        QComboBox::drop-down {
+            border: none;
+        }
+        QComboBox QLineEdit, QAbstractSpinBox QLineEdit {
+            border: none;
+            padding: 0;
+            background: transparent;
+        }
+        QListWidget, QTextEdit {
+            border-radius: 8px;
+            font-size: 14px;
+            border: 1px solid rgba(0, 0, 0, 0.2);
+            background: rgba(255, 255, 255, 0.95);
+            color: black;
+        }
+        QPushButton {
+            border-radius: 8px;
+            font-size: 14px;
+            border: 1px solid rgba(0, 0, 0, 0.1);
+            background: rgba(0, 120, 212, 0.8);
+            color: white;
+        }
+        QPushButton:hover {
+            background: rgba(0, 120, 212, 1.0);
+        }
+        QPushButton[role="danger"] {
+            background: rgba(200, 0, 0, 0.8);
+        }
+        QPushButton[role="danger"]:hover {
+            background: rgba(200, 0, 0, 1.0);
+        }
+        QTableView {
+            border: 1px solid rgba(0, 0, 0, 0.1);
+            border-radius: 8px;
+            background: rgba(255, 255, 255, 0.95);
+            font-size: 12px;
+            color: black;
+        }
+        QTableView::item {
+            padding: 5px;
+            border-bottom: 1px solid rgba(0, 0, 0, 0.1);
+        }
+        QHeaderView::section {
+            font-weight: bold;
+            font-size: 14px;
+            padding: 5px;
+            border: none;
+            background: transparent;
+            color: black;
+        }
+        QLabel#metrics_overlay {
+            background: rgba(0, 0, 0, 0.75);
+            color: #9f9;
+            padding: 6px;
+            border-radius: 6px;
+        }
+    """
+
+    def __init__(self, profiler=None):
         super().__init__()
+        self.profiler = profiler or StartupProfiler()
         self.setWindowTitle("Digital & Analog Clock")
         self.setGeometry(100, 100, 1000, 700)
         self.setWindowIcon(QIcon('icon.ico'))  # Assuming an icon file exists
@@ -97,135 +1746,35 @@ class DigitalClock(QMainWindow):
         # Language and theme settings
         self.current_lang = 'en'
         self.current_theme = 'Windows'
-        self.time_format = '24'
+        self.time_format = '12'
+        self.show_seconds = True
+        self.canvas_mode = False
+        self.clock_canvas = None
+        self.sweep_mode = False
+        self.sweep_fps = SweepAnimator.fps
         self.timezones = ['Asia/Tehran']  # Default with Iran
         self.clocks = []
-        self.history = []
-        self.load_history()
+        self.clock_labels = []
+        self.history = HistoryLog()
+        self.history_store = HistoryStore()
+        self.export_worker = None
+        self.history_loader = None
+        self.metrics_overlay = None
+        # Whether --metrics or an export wants instrumentation regardless of the overlay
+        self.metrics_requested = metrics.enabled
+        self.metrics_server = None
+        self.config_watcher = None
+        self.session_store = SessionStore()
+        session = self.session_store.load()
+        if session is not None:
+            self.restore_session(session)
         
-        # Language dictionaries
-        self.texts = {
-            'en': {
-                'title': 'Digital & Analog Clock',
-                'timezone_label': 'Select Timezone:',
-                'add_timezone_btn': 'Add Timezone',
-                'remove_timezone_btn': 'Remove Selected',
-                'format_label': 'Time Format:',
-                'digital_label': 'Digital Clocks:',
-                'analog_label': 'Analog Clocks:',
-                'history_tab': 'Time Check History',
-                'settings_tab': 'Settings',
-                'language_label': 'Language:',
-                'theme_label': 'Theme:',
-                'clear_history': 'Clear History',
-                'status_idle': 'Displaying current time...',
-                'status_updated': 'Time updated: {time}',
-                'status_added': 'Timezone {tz} added',
-                'status_removed': 'Timezone {tz} removed',
-                'history_time': 'Time',
-                'history_timezone': 'Timezone',
-                'history_date': 'Date',
-                'save_history': 'Save History to File',
-                'apply': 'Apply',
-                'file_menu': 'File',
-                'exit_action': 'Exit',
-                'about': 'About',
-                'about_text': 'Digital & Analog Clock\nVersion 1.0\nDeveloped by Hamid Yarali\nGitHub: https://github.com/HamidYaraliOfficial\nInstagram: https://www.instagram.com/hamidyaraliofficial\nTelegram: @Hamid_Yarali',
-                'copy_btn': 'Copy Time',
-                'format_12': '12-Hour',
-                'format_24': '24-Hour'
-            },
-            'fa': {
-                'title': 'ساعت دیجیتال و عقربه‌ای',
-                'timezone_label': 'انتخاب منطقه زمانی:',
-                'add_timezone_btn': 'افزودن منطقه زمانی',
-                'remove_timezone_btn': 'حذف انتخاب‌شده',
-                'format_label': 'فرمت زمان:',
-                'digital_label': 'ساعت‌های دیجیتال:',
-                'analog_label': 'ساعت‌های عقربه‌ای:',
-                'history_tab': 'تاریخچه بررسی زمان',
-                'settings_tab': 'تنظیمات',
-                'language_label': 'زبان:',
-                'theme_label': 'تم:',
-                'clear_history': 'پاک کردن تاریخچه',
-                'status_idle': 'نمایش زمان کنونی...',
-                'status_updated': 'زمان به‌روزرسانی شد: {time}',
-                'status_added': 'منطقه زمانی {tz} اضافه شد',
-                'status_removed': 'منطقه زمانی {tz} حذف شد',
-                'history_time': 'زمان',
-                'history_timezone': 'منطقه زمانی',
-                'history_date': 'تاریخ',
-                'save_history': 'ذخیره تاریخچه در فایل',
-                'apply': 'اعمال',
-                'file_menu': 'فایل',
-                'exit_action': 'خروج',
-                'about': 'درباره',
-                'about_text': 'ساعت دیجیتال و عقربه‌ای\nنسخه 1.0\nتوسعه‌یافته توسط حمید یارعلی\nگیت‌هاب: https://github.com/HamidYaraliOfficial\nاینستاگرام: https://www.instagram.com/hamidyaraliofficial\nتلگرام: @Hamid_Yarali',
-                'copy_btn': 'کپی زمان',
-                'format_12': '12 ساعته',
-                'format_24': '24 ساعته'
-            },
-            'zh': {
-                'title': '数字与模拟时钟',
-                'timezone_label': '选择时区：',
-                'add_timezone_btn': '添加时区',
-                'remove_timezone_btn': '移除选定',
-                'format_label': '时间格式：',
-                'digital_label': '数字时钟：',
-                'analog_label': '模拟时钟：',
-                'history_tab': '时间检查历史',
-                'settings_tab': '设置',
-                'language_label': '语言：',
-                'theme_label': '主题：',
-                'clear_history': '清除历史记录',
-                'status_idle': '显示当前时间...',
-                'status_updated': '时间已更新：{time}',
-                'status_added': '已添加时区 {tz}',
-                'status_removed': '已移除时区 {tz}',
-                'history_time': '时间',
-                'history_timezone': '时区',
-                'history_date': '日期',
-                'save_history': '将历史记录保存到文件',
-                'apply': '应用',
-                'file_menu': '文件',
-                'exit_action': '退出',
-                'about': '关于',
-                'about_text': '数字与模拟时钟\n版本 1.0\n由 Hamid Yarali 开发\nGitHub: https://github.com/HamidYaraliOfficial\nInstagram: https://www.instagram.com/hamidyaraliofficial\nTelegram: @Hamid_Yarali',
-                'copy_btn': '复制时间',
-                'format_12': '12小时制',
-                'format_24': '24小时制'
-            },
-            'ru': {
-                'title': 'Цифровые и аналоговые часы',
-                'timezone_label': 'Часовой пояс:',
-                'add_timezone_btn': 'Добавить часовой пояс',
-                'remove_timezone_btn': 'Удалить выбранный',
-                'format_label': 'Формат времени:',
-                'digital_label': 'Цифровые часы:',
-                'analog_label': 'Аналоговые часы:',
-                'history_tab': 'История проверки времени',
-                'settings_tab': 'Настройки',
-                'language_label': 'Язык:',
-                'theme_label': 'Тема:',
-                'clear_history': 'Очистить историю',
-                'status_idle': 'Отображение текущего времени...',
-                'status_updated': 'Время обновлено: {time}',
-                'status_added': 'Часовой пояс {tz} добавлен',
-                'status_removed': 'Часовой пояс {tz} удален',
-                'history_time': 'Время',
-                'history_timezone': 'Часовой пояс',
-                'history_date': 'Дата',
-                'save_history': 'Сохранить историю в файл',
-                'apply': 'Применить',
-                'file_menu': 'Файл',
-                'exit_action': 'Выход',
-                'about': 'О программе',
-                'about_text': 'Цифровые и аналоговые часы\nВерсия 1.0\nРазработано Hamid Yarali\nGitHub: https://github.com/HamidYaraliOfficial\nInstagram: https://www.instagram.com/hamidyaraliofficial\nTelegram: @Hamid_Yarali',
-                'copy_btn': 'Копировать время',
-                'format_12': '12-часовой',
-                'format_24': '24-часовой'
-            }
-        }
+        # Translations are read from translations/<lang>.json on first use
+        self.texts = TranslationCatalog()
+        # (setter, text key) for every widget text that follows the language
+        self.translations = []
+        self.aligned_labels = []
+        self.translated_lang = None
 
         # Theme dictionaries
         self.themes = {
@@ -237,7 +1786,10 @@ class DigitalClock(QMainWindow):
                 'button_hover': QColor(200, 200, 200),
                 'accent': QColor(0, 120, 212),
                 'border': QColor(180, 180, 180),
-                'header': QColor(220, 220, 220)
+                'header': QColor(220, 220, 220),
+                'clock_face': QColor(255, 255, 255),
+                'clock_ink': QColor(0, 0, 0),
+                'clock_second': QColor(200, 0, 0)
             },
             'Dark': {
                 'background': QColor(32, 32, 32),
@@ -247,7 +1799,10 @@ class DigitalClock(QMainWindow):
                 'button_hover': QColor(70, 70, 70),
                 'accent': QColor(0, 120, 212),
                 'border': QColor(80, 80, 80),
-                'header': QColor(40, 40, 40)
+                'header': QColor(40, 40, 40),
+                'clock_face': QColor(45, 45, 45),
+                'clock_ink': QColor(230, 230, 230),
+                'clock_second': QColor(255, 80, 80)
             },
             'Red': {
                 'background': QColor(255, 235, 235),
@@ -257,7 +1812,10 @@ class DigitalClock(QMainWindow):
                 'button_hover': QColor(255, 180, 180),
                 'accent': QColor(200, 0, 0),
                 'border': QColor(220, 150, 150),
-                'header': QColor(255, 220, 220)
+                'header': QColor(255, 220, 220),
+                'clock_face': QColor(255, 255, 255),
+                'clock_ink': QColor(80, 0, 0),
+                'clock_second': QColor(200, 0, 0)
             },
             'Blue': {
                 'background': QColor(235, 245, 255),
@@ -267,60 +1825,84 @@ class DigitalClock(QMainWindow):
                 'button_hover': QColor(180, 200, 255),
                 'accent': QColor(0, 0, 200),
                 'border': QColor(150, 180, 220),
-                'header': QColor(220, 235, 255)
+                'header': QColor(220, 235, 255),
+                'clock_face': QColor(255, 255, 255),
+                'clock_ink': QColor(0, 0, 80),
+                'clock_second': QColor(200, 0, 0)
             }
         }
+        self.compiled_themes = {}
+        self.styles = {}
+        self.applied_theme = None
+
+        self.profiler.mark('window setup')
 
         # Initialize UI
         self.init_ui()
+        self.translated_lang = self.current_lang
+        self.profiler.mark('init_ui')
         self.apply_theme(self.current_theme)
-        self.update_texts()
-
-        # Timer for updating clocks
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_clocks)
-        self.timer.start(1000)
+        self.profiler.mark('apply_theme')
+
+        # Ticker for updating clocks, running only while the clock tab is visible
+        self.ticker = ClockTicker(self)
+        self.ticker.tick.connect(self.update_clocks)
+        self.tabs.currentChanged.connect(self.update_ticker_state)
+        self.ticker.set_granularity('second' if self.show_seconds else 'minute')
+        self.sweep_animator = SweepAnimator(self)
+        self.sweep_animator.set_fps(self.sweep_fps)
+        self.ticker.tick.connect(self.sweep_animator.sync)
+        self.sweep_animator.frame.connect(self.sweep_clocks)
+
+        # Settings and board changes are saved once things settle
+        self.session_save_timer = QTimer(self)
+        self.session_save_timer.setSingleShot(True)
+        self.session_save_timer.setInterval(1000)
+        self.session_save_timer.timeout.connect(self.save_session)
+
+        # Clocks and the upcoming list are refreshed right at the next offset change
+        self.transition_timer = QTimer(self)
+        self.transition_timer.setSingleShot(True)
+        self.transition_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.transition_timer.timeout.connect(self.transition_reached)
+        # Loading the transition tables waits until the window is up
+        QTimer.singleShot(0, self.schedule_transitions)
+
+        # History is appended in memory and fsynced in batches, starting once
+        # the existing log has been read in the background
+        self.history_flush_timer = QTimer(self)
+        self.history_flush_timer.timeout.connect(self.history_store.flush)
+        QTimer.singleShot(0, self.load_history)
 
     def init_ui(self):
         # Main widget and layout
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
+        # Scoped to the central widget so dialogs parented to the window keep
+        # the style's own look
+        self.central_widget.setStyleSheet(self.stylesheet)
         self.main_layout = QVBoxLayout(self.central_widget)
         self.main_layout.setContentsMargins(20, 20, 20, 20)
         self.main_layout.setSpacing(15)
 
         # Menu bar
         self.menu_bar = QMenuBar()
-        self.file_menu = QMenu(self.texts['en']['file_menu'])
-        self.exit_action = self.file_menu.addAction(self.texts['en']['exit_action'])
+        self.file_menu = QMenu()
+        self.exit_action = self.file_menu.addAction('')
         self.exit_action.triggered.connect(self.close)
-        self.about_action = self.file_menu.addAction(self.texts['en']['about'])
+        self.about_action = self.file_menu.addAction('')
         self.about_action.triggered.connect(self.show_about)
+        self.overlay_action = self.file_menu.addAction('')
+        self.overlay_action.setCheckable(True)
+        self.overlay_action.setShortcut(QKeySequence('F12'))
+        self.overlay_action.toggled.connect(self.toggle_overlay)
+        self.export_metrics_action = self.file_menu.addAction('')
+        self.export_metrics_action.triggered.connect(self.export_metrics)
         self.menu_bar.addMenu(self.file_menu)
         self.main_layout.addWidget(self.menu_bar)
 
         # Tab widget
         self.tabs = QTabWidget()
-        self.tabs.setStyleSheet("""
-            QTabWidget::pane {
-                border: 1px solid rgba(0, 0, 0, 0.1);
-                border-radius: 8px;
-                background: rgba(255, 255, 255, 0.95);
-            }
-            QTabBar::tab {
-                padding: 10px 20px;
-                margin-right: 5px;
-                border-top-left-radius: 8px;
-                border-top-right-radius: 8px;
-                background: rgba(0, 0, 0, 0.05);
-                color: black;
-            }
-            QTabBar::tab:selected {
-                background: rgba(0, 120, 212, 0.3);
-                font-weight: bold;
-                color: black;
-            }
-        """)
         self.main_layout.addWidget(self.tabs)
 
         # Clock tab
@@ -332,95 +1914,44 @@ class DigitalClock(QMainWindow):
         # Timezone selection
         self.timezone_label = QLabel()
         self.timezone_label.setFont(QFont("Segoe UI", 12))
-        self.timezone_combo = QComboBox()
-        self.timezone_combo.addItems(pytz.common_timezones)
+        self.timezone_index = TimezoneIndex()
+        self.timezone_combo = TimezonePicker(self.timezone_index)
         self.timezone_combo.setCurrentText('Asia/Tehran')
         self.timezone_combo.setFixedHeight(40)
-        self.timezone_combo.setStyleSheet("""
-            QComboBox {
-                border-radius: 8px;
-                padding: 8px;
-                font-size: 14px;
-                border: 1px solid rgba(0, 0, 0, 0.2);
-                background: rgba(255, 255, 255, 0.95);
-                color: black;
-            }
-            QComboBox::drop-down {
-                border: none;
-            }
-        """)
 
         # Add/Remove timezone buttons
         self.add_timezone_btn = QPushButton()
         self.add_timezone_btn.setFixedHeight(40)
         self.add_timezone_btn.setFont(QFont("Segoe UI", 12))
-        self.add_timezone_btn.setStyleSheet("""
-            QPushButton {
-                border-radius: 8px;
-                font-size: 14px;
-                border: 1px solid rgba(0, 0, 0, 0.1);
-                background: rgba(0, 120, 212, 0.8);
-                color: white;
-            }
-            QPushButton:hover {
-                background: rgba(0, 120, 212, 1.0);
-            }
-        """)
         self.add_timezone_btn.clicked.connect(self.add_timezone)
 
         self.remove_timezone_btn = QPushButton()
         self.remove_timezone_btn.setFixedHeight(40)
         self.remove_timezone_btn.setFont(QFont("Segoe UI", 12))
-        self.remove_timezone_btn.setStyleSheet("""
-            QPushButton {
-                border-radius: 8px;
-                font-size: 14px;
-                border: 1px solid rgba(0, 0, 0, 0.1);
-                background: rgba(200, 0, 0, 0.8);
-                color: white;
-            }
-            QPushButton:hover {
-                background: rgba(200, 0, 0, 1.0);
-            }
-        """)
+        self.remove_timezone_btn.setProperty('role', 'danger')
         self.remove_timezone_btn.clicked.connect(self.remove_timezone)
 
         # Time format selection
         self.format_label = QLabel()
         self.format_label.setFont(QFont("Segoe UI", 12))
         self.format_combo = QComboBox()
-        self.format_combo.addItems([self.texts['en']['format_12'], self.texts['en']['format_24']])
+        self.format_combo.addItems(['', ''])
+        self.format_combo.setCurrentIndex(0 if self.time_format == '12' else 1)
         self.format_combo.setFixedHeight(40)
-        self.format_combo.setStyleSheet("""
-            QComboBox {
-                border-radius: 8px;
-                padding: 8px;
-                font-size: 14px;
-                border: 1px solid rgba(0, 0, 0, 0.2);
-                background: rgba(255, 255, 255, 0.95);
-                color: black;
-            }
-            QComboBox::drop-down {
-                border: none;
-            }
-        """)
         self.format_combo.currentIndexChanged.connect(self.change_format)
 
         # Timezone list
         self.timezone_list = QListWidget()
         self.timezone_list.setFixedHeight(100)
-        self.timezone_list.setStyleSheet("""
-            QListWidget {
-                border-radius: 8px;
-                font-size: 14px;
-                border: 1px solid rgba(0, 0, 0, 0.2);
-                background: rgba(255, 255, 255, 0.95);
-                color: black;
-            }
-        """)
         for tz in self.timezones:
             self.timezone_list.addItem(tz)
 
+        # Next DST/offset change of each zone
+        self.upcoming_label = QLabel()
+        self.upcoming_label.setFont(QFont("Segoe UI", 12))
+        self.upcoming_list = QListWidget()
+        self.upcoming_list.setFixedHeight(100)
+
         # Digital clocks
         self.digital_label = QLabel()
         self.digital_label.setFont(QFont("Segoe UI", 12))
@@ -439,33 +1970,12 @@ class DigitalClock(QMainWindow):
         self.copy_btn = QPushButton()
         self.copy_btn.setFixedHeight(40)
         self.copy_btn.setFont(QFont("Segoe UI", 12))
-        self.copy_btn.setStyleSheet("""
-            QPushButton {
-                border-radius: 8px;
-                font-size: 14px;
-                border: 1px solid rgba(0, 0, 0, 0.1);
-                background: rgba(0, 120, 212, 0.8);
-                color: white;
-            }
-            QPushButton:hover {
-                background: rgba(0, 120, 212, 1.0);
-            }
-        """)
         self.copy_btn.clicked.connect(self.copy_to_clipboard)
 
         # Status text
         self.status_text = QTextEdit()
         self.status_text.setReadOnly(True)
         self.status_text.setFixedHeight(100)
-        self.status_text.setStyleSheet("""
-            QTextEdit {
-                border-radius: 8px;
-                font-size: 14px;
-                border: 1px solid rgba(0, 0, 0, 0.2);
-                background: rgba(255, 255, 255, 0.95);
-                color: black;
-            }
-        """)
 
         # Layout for clock tab
         timezone_layout = QHBoxLayout()
@@ -476,6 +1986,8 @@ class DigitalClock(QMainWindow):
         self.clock_layout.addWidget(self.timezone_label)
         self.clock_layout.addLayout(timezone_layout)
         self.clock_layout.addWidget(self.timezone_list)
+        self.clock_layout.addWidget(self.upcoming_label)
+        self.clock_layout.addWidget(self.upcoming_list)
         self.clock_layout.addWidget(self.format_label)
         self.clock_layout.addWidget(self.format_combo)
         self.clock_layout.addWidget(self.digital_label)
@@ -485,61 +1997,115 @@ class DigitalClock(QMainWindow):
         self.clock_layout.addWidget(self.copy_btn)
         self.clock_layout.addWidget(self.status_text)
 
-        # History tab
+        # History and settings tabs are filled in on first activation
+        self.history_model = HistoryModel(self.texts, self.history, self)
+        self.history_model.set_time_format(self.time_format_str())
+        self.history_model.set_language(self.current_lang)
         self.history_tab = QWidget()
         self.history_layout = QVBoxLayout(self.history_tab)
-        self.history_scroll = QScrollArea()
-        self.history_scroll.setWidgetResizable(True)
-        self.history_content = QWidget()
-        self.history_grid = QGridLayout(self.history_content)
-        self.history_grid.setSpacing(10)
-        self.history_scroll.setWidget(self.history_content)
-        self.history_scroll.setStyleSheet("""
-            QScrollArea {
-                border: 1px solid rgba(0, 0, 0, 0.1);
-                border-radius: 8px;
-                background: rgba(255, 255, 255, 0.95);
-            }
-        """)
+        self.history_tab_built = False
+        self.settings_tab = QWidget()
+        self.settings_layout = QVBoxLayout(self.settings_tab)
+        self.settings_tab_built = False
+
+        # Add tabs
+        self.tabs.addTab(self.clock_tab, '')
+        self.tabs.addTab(self.history_tab, '')
+        self.tabs.addTab(self.settings_tab, '')
+
+        self.tabs.currentChanged.connect(self.build_current_tab)
+
+        # Texts that follow the language setting
+        self.translate(self.setWindowTitle, 'title')
+        self.translate(self.file_menu.setTitle, 'file_menu')
+        self.translate(self.exit_action.setText, 'exit_action')
+        self.translate(self.about_action.setText, 'about')
+        self.translate(self.overlay_action.setText, 'overlay_action')
+        self.translate(self.export_metrics_action.setText, 'export_metrics')
+        self.translate(self.timezone_label.setText, 'timezone_label')
+        self.translate(self.upcoming_label.setText, 'upcoming_label')
+        self.translate(self.add_timezone_btn.setText, 'add_timezone_btn')
+        self.translate(self.remove_timezone_btn.setText, 'remove_timezone_btn')
+        self.translate(self.format_label.setText, 'format_label')
+        self.translate(lambda text: self.format_combo.setItemText(0, text), 'format_12')
+        self.translate(lambda text: self.format_combo.setItemText(1, text), 'format_24')
+        self.translate(self.digital_label.setText, 'digital_label')
+        self.translate(self.analog_label.setText, 'analog_label')
+        self.translate(self.copy_btn.setText, 'copy_btn')
+        self.translate(self.status_text.setText, 'status_idle')
+        self.translate(lambda text: self.tabs.setTabText(0, text), 'history_tab')
+        self.translate(lambda text: self.tabs.setTabText(1, text), 'history_tab')
+        self.translate(lambda text: self.tabs.setTabText(2, text), 'settings_tab')
+        self.align_labels([self.timezone_label, self.upcoming_label, self.format_label, self.digital_label,
+                           self.analog_label])
+
+        # Initialize clocks
+        self.update_clocks_ui()
+        self.update_clocks()
+
+    def build_current_tab(self, index=None):
+        tab = self.tabs.currentWidget()
+        if tab is self.history_tab and not self.history_tab_built:
+            self.build_history_tab()
+        elif tab is self.settings_tab and not self.settings_tab_built:
+            self.build_settings_tab()
+
+    def build_history_tab(self):
+        self.history_tab_built = True
+        self.history_view = QTableView()
+        self.history_view.setModel(self.history_model)
+        self.history_view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.history_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.history_view.setWordWrap(False)
+        self.history_view.setShowGrid(False)
+        self.history_view.verticalHeader().hide()
+        # Fixed row heights keep the view from measuring every row
+        self.history_view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.history_view.verticalHeader().setDefaultSectionSize(30)
+        self.history_view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        # Filter bar
+        self.history_zone_filter = QLineEdit()
+        self.history_zone_filter.setFixedHeight(40)
+        self.history_zone_filter.setClearButtonEnabled(True)
+        self.history_action_filter = QComboBox()
+        self.history_action_filter.setFixedHeight(40)
+        self.history_action_filter.addItems([''] * (len(HistoryAction) + 1))
+        self.history_range_filter = QComboBox()
+        self.history_range_filter.setFixedHeight(40)
+        self.history_range_filter.addItems([''] * len(self.history_ranges))
+        self.history_zone_filter.textChanged.connect(self.apply_history_filter)
+        self.history_action_filter.currentIndexChanged.connect(self.apply_history_filter)
+        self.history_range_filter.currentIndexChanged.connect(self.apply_history_filter)
+        history_filter_layout = QHBoxLayout()
+        history_filter_layout.addWidget(self.history_zone_filter, 2)
+        history_filter_layout.addWidget(self.history_action_filter, 1)
+        history_filter_layout.addWidget(self.history_range_filter, 1)
+
         self.clear_history_btn = QPushButton()
         self.clear_history_btn.setFixedHeight(40)
         self.clear_history_btn.setFont(QFont("Segoe UI", 12))
-        self.clear_history_btn.setStyleSheet("""
-            QPushButton {
-                border-radius: 8px;
-                font-size: 14px;
-                border: 1px solid rgba(0, 0, 0, 0.1);
-                background: rgba(200, 0, 0, 0.8);
-                color: white;
-            }
-            QPushButton:hover {
-                background: rgba(200, 0, 0, 1.0);
-            }
-        """)
+        self.clear_history_btn.setProperty('role', 'danger')
         self.clear_history_btn.clicked.connect(self.clear_history)
         self.save_history_btn = QPushButton()
         self.save_history_btn.setFixedHeight(40)
         self.save_history_btn.setFont(QFont("Segoe UI", 12))
-        self.save_history_btn.setStyleSheet("""
-            QPushButton {
-                border-radius: 8px;
-                font-size: 14px;
-                border: 1px solid rgba(0, 0, 0, 0.1);
-                background: rgba(0, 120, 212, 0.8);
-                color: white;
-            }
-            QPushButton:hover {
-                background: rgba(0, 120, 212, 1.0);
-            }
-        """)
         self.save_history_btn.clicked.connect(self.save_history_to_file)
-        self.history_layout.addWidget(self.history_scroll)
+        self.history_layout.addLayout(history_filter_layout)
+        self.history_layout.addWidget(self.history_view)
         self.history_layout.addWidget(self.clear_history_btn)
         self.history_layout.addWidget(self.save_history_btn)
 
-        # Settings tab
-        self.settings_tab = QWidget()
-        self.settings_layout = QVBoxLayout(self.settings_tab)
+        self.translate(self.clear_history_btn.setText, 'clear_history')
+        self.translate(self.save_history_btn.setText, 'save_history')
+        self.translate(self.history_zone_filter.setPlaceholderText, 'filter_zone')
+        self.translate(lambda text: self.history_action_filter.setItemText(0, text), 'filter_all_actions')
+        for action in HistoryAction:
+            self.translate(lambda text, i=action + 1: self.history_action_filter.setItemText(i, text), action.text_key)
+        for i, (key, _) in enumerate(self.history_ranges):
+            self.translate(lambda text, i=i: self.history_range_filter.setItemText(i, text), key)
+
+    def build_settings_tab(self):
+        self.settings_tab_built = True
         self.settings_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
         self.settings_layout.setSpacing(10)
 
@@ -548,19 +2114,7 @@ class DigitalClock(QMainWindow):
         self.language_combo = QComboBox()
         self.language_combo.addItems(['English', 'فارسی', '中文', 'Русский'])
         self.language_combo.setFixedHeight(40)
-        self.language_combo.setStyleSheet("""
-            QComboBox {
-                border-radius: 8px;
-                padding: 8px;
-                font-size: 14px;
-                border: 1px solid rgba(0, 0, 0, 0.2);
-                background: rgba(255, 255, 255, 0.95);
-                color: black;
-            }
-            QComboBox::drop-down {
-                border: none;
-            }
-        """)
+        self.language_combo.setCurrentIndex(self.languages.index(self.current_lang))
         self.language_combo.currentIndexChanged.connect(self.change_language)
 
         self.theme_label = QLabel()
@@ -568,57 +2122,80 @@ class DigitalClock(QMainWindow):
         self.theme_combo = QComboBox()
         self.theme_combo.addItems(['Windows', 'Dark', 'Red', 'Blue'])
         self.theme_combo.setFixedHeight(40)
-        self.theme_combo.setStyleSheet("""
-            QComboBox {
-                border-radius: 8px;
-                padding: 8px;
-                font-size: 14px;
-                border: 1px solid rgba(0, 0, 0, 0.2);
-                background: rgba(255, 255, 255, 0.95);
-                color: black;
-            }
-            QComboBox::drop-down {
-                border: none;
-            }
-        """)
+        self.theme_combo.setCurrentIndex(list(self.themes).index(self.current_theme))
         self.theme_combo.currentIndexChanged.connect(self.change_theme)
 
+        self.show_seconds_check = QCheckBox()
+        self.show_seconds_check.setFont(QFont("Segoe UI", 12))
+        self.show_seconds_check.setChecked(self.show_seconds)
+        self.show_seconds_check.toggled.connect(self.change_show_seconds)
+
+        self.canvas_mode_check = QCheckBox()
+        self.canvas_mode_check.setFont(QFont("Segoe UI", 12))
+        self.canvas_mode_check.setChecked(self.canvas_mode)
+        self.canvas_mode_check.toggled.connect(self.change_canvas_mode)
+
+        self.sweep_mode_check = QCheckBox()
+        self.sweep_mode_check.setFont(QFont("Segoe UI", 12))
+        self.sweep_mode_check.setChecked(self.sweep_mode)
+        self.sweep_mode_check.toggled.connect(self.change_sweep_mode)
+        self.sweep_fps_label = QLabel()
+        self.sweep_fps_label.setFont(QFont("Segoe UI", 12))
+        self.sweep_fps_spin = QSpinBox()
+        self.sweep_fps_spin.setRange(1, 120)
+        self.sweep_fps_spin.setValue(self.sweep_animator.fps)
+        self.sweep_fps_spin.setFixedHeight(40)
+        self.sweep_fps_spin.valueChanged.connect(self.change_sweep_fps)
+        sweep_layout = QHBoxLayout()
+        sweep_layout.addWidget(self.sweep_mode_check)
+        sweep_layout.addStretch()
+        sweep_layout.addWidget(self.sweep_fps_label)
+        sweep_layout.addWidget(self.sweep_fps_spin)
+
         self.apply_btn = QPushButton()
         self.apply_btn.setFixedHeight(40)
         self.apply_btn.setFont(QFont("Segoe UI", 12))
-        self.apply_btn.setStyleSheet("""
-            QPushButton {
-                border-radius: 8px;
-                font-size: 14px;
-                border: 1px solid rgba(0, 0, 0, 0.1);
-                background: rgba(0, 120, 212, 0.8);
-                color: white;
-            }
-            QPushButton:hover {
-                background: rgba(0, 120, 212, 1.0);
-            }
-        """)
         self.apply_btn.clicked.connect(self.apply_settings)
 
         self.settings_layout.addWidget(self.language_label)
         self.settings_layout.addWidget(self.language_combo)
         self.settings_layout.addWidget(self.theme_label)
         self.settings_layout.addWidget(self.theme_combo)
+        self.settings_layout.addWidget(self.show_seconds_check)
+        self.settings_layout.addWidget(self.canvas_mode_check)
+        self.settings_layout.addLayout(sweep_layout)
         self.settings_layout.addWidget(self.apply_btn)
         self.settings_layout.addStretch()
 
-        # Add tabs
-        self.tabs.addTab(self.clock_tab, self.texts['en']['history_tab'])
-        self.tabs.addTab(self.history_tab, self.texts['en']['history_tab'])
-        self.tabs.addTab(self.settings_tab, self.texts['en']['settings_tab'])
-
-        # Initialize clocks
-        self.update_clocks_ui()
-        self.update_clocks()
+        self.translate(self.language_label.setText, 'language_label')
+        self.translate(self.theme_label.setText, 'theme_label')
+        self.translate(self.show_seconds_check.setText, 'show_seconds')
+        self.translate(self.canvas_mode_check.setText, 'canvas_mode')
+        self.translate(self.sweep_mode_check.setText, 'sweep_mode')
+        self.translate(self.sweep_fps_label.setText, 'sweep_fps')
+        self.translate(self.apply_btn.setText, 'apply')
+        self.align_labels([self.language_label, self.theme_label])
 
     def apply_theme(self, theme_name):
-        palette = QPalette()
+        # Re-applying the current theme (Apply, language switches) is free
+        if theme_name == self.applied_theme:
+            return
+        self.applied_theme = theme_name
+        compiled = self.compile_theme(theme_name)
+        self.setPalette(compiled['palette'])
+        self.setStyle(compiled['style'])
+        for _, analog_clock in self.clocks:
+            analog_clock.set_theme(theme_name, compiled['clock_colors'])
+        if self.clock_canvas is not None:
+            self.clock_canvas.set_theme(theme_name, compiled['clock_colors'])
+
+    def compile_theme(self, theme_name):
+        # Palette, style object and clock colors are built once per theme
+        compiled = self.compiled_themes.get(theme_name)
+        if compiled is not None:
+            return compiled
         theme = self.themes.get(theme_name, self.themes['Windows'])
+        palette = QPalette()
         palette.setColor(QPalette.ColorRole.Window, theme['background'])
         palette.setColor(QPalette.ColorRole.WindowText, theme['text'])
         palette.setColor(QPalette.ColorRole.Button, theme['button'])
@@ -627,92 +2204,395 @@ class DigitalClock(QMainWindow):
         palette.setColor(QPalette.ColorRole.Base, theme['background'])
         palette.setColor(QPalette.ColorRole.AlternateBase, theme['header'])
         palette.setColor(QPalette.ColorRole.Text, theme['text'])
-        self.setPalette(palette)
-        self.setStyle(QStyleFactory.create('WindowsVista' if theme_name == 'Windows' else 'Fusion'))
+        style_name = 'WindowsVista' if theme_name == 'Windows' else 'Fusion'
+        if style_name not in self.styles:
+            self.styles[style_name] = QStyleFactory.create(style_name)
+        compiled = {
+            'palette': palette,
+            'style': self.styles[style_name],
+            'clock_colors': {
+                'face': theme['clock_face'],
+                'ink': theme['clock_ink'],
+                'second': theme['clock_second']
+            }
+        }
+        self.compiled_themes[theme_name] = compiled
+        return compiled
+
+    def clock_colors(self, theme_name):
+        return self.compile_theme(theme_name)['clock_colors']
+
+    def translate(self, setter, key):
+        # Registers a widget text with the language switch and sets it now
+        self.translations.append((setter, key))
+        setter(self.texts[self.current_lang][key])
+
+    def align_labels(self, labels):
+        self.aligned_labels.extend(labels)
+        alignment = Qt.AlignmentFlag.AlignRight if self.current_lang == 'fa' else Qt.AlignmentFlag.AlignLeft
+        for label in labels:
+            label.setAlignment(alignment)
 
     def update_texts(self):
         lang = self.current_lang
-        self.setWindowTitle(self.texts[lang]['title'])
-        self.timezone_label.setText(self.texts[lang]['timezone_label'])
-        self.add_timezone_btn.setText(self.texts[lang]['add_timezone_btn'])
-        self.remove_timezone_btn.setText(self.texts[lang]['remove_timezone_btn'])
-        self.format_label.setText(self.texts[lang]['format_label'])
-        self.digital_label.setText(self.texts[lang]['digital_label'])
-        self.analog_label.setText(self.texts[lang]['analog_label'])
-        self.copy_btn.setText(self.texts[lang]['copy_btn'])
-        self.status_text.setText(self.texts[lang]['status_idle'])
-        self.clear_history_btn.setText(self.texts[lang]['clear_history'])
-        self.save_history_btn.setText(self.texts[lang]['save_history'])
-        self.language_label.setText(self.texts[lang]['language_label'])
-        self.theme_label.setText(self.texts[lang]['theme_label'])
-        self.apply_btn.setText(self.texts[lang]['apply'])
-        self.file_menu.setTitle(self.texts[lang]['file_menu'])
-        self.exit_action.setText(self.texts[lang]['exit_action'])
-        self.about_action.setText(self.texts[lang]['about'])
-        self.tabs.setTabText(0, self.texts[lang]['history_tab'])
-        self.tabs.setTabText(1, self.texts[lang]['history_tab'])
-        self.tabs.setTabText(2, self.texts[lang]['settings_tab'])
-
-        # Update format combo
-        current_format = self.format_combo.currentText()
-        self.format_combo.clear()
-        self.format_combo.addItems([self.texts[lang]['format_12'], self.texts[lang]['format_24']])
-        if current_format:
-            index = 0 if current_format == self.texts['en']['format_12'] else 1
-            self.format_combo.setCurrentIndex(index)
-
-        # Set text alignment
+        if lang == self.translated_lang:
+            return
+        self.translated_lang = lang
+        texts = self.texts[lang]
+        for setter, key in self.translations:
+            setter(texts[key])
         alignment = Qt.AlignmentFlag.AlignRight if lang == 'fa' else Qt.AlignmentFlag.AlignLeft
-        self.timezone_label.setAlignment(alignment)
-        self.format_label.setAlignment(alignment)
-        self.digital_label.setAlignment(alignment)
-        self.analog_label.setAlignment(alignment)
-        self.language_label.setAlignment(alignment)
-        self.theme_label.setAlignment(alignment)
+        for label in self.aligned_labels:
+            label.setAlignment(alignment)
 
     def change_language(self, index):
-        langs = ['en', 'fa', 'zh', 'ru']
-        self.current_lang = langs[index]
+        self.current_lang = self.languages[index]
         self.update_texts()
-        self.update_history_ui()
+        self.history_model.set_language(self.current_lang)
+        if self.history_tab_built:
+            self.history_view.viewport().update()
         self.update_clocks()
+        self.schedule_transitions()
+        self.session_save_timer.start()
 
     def change_theme(self, index):
-        themes = ['Windows', 'Dark', 'Red', 'Blue']
-        self.current_theme = themes[index]
+        self.current_theme = self.theme_names[index]
         self.apply_theme(self.current_theme)
+        self.session_save_timer.start()
 
     def change_format(self, index):
         self.time_format = '12' if index == 0 else '24'
+        self.history_model.set_time_format(self.time_format_str())
+        self.update_clocks()
+        self.schedule_transitions()
+        self.session_save_timer.start()
+
+    def change_show_seconds(self, checked):
+        self.show_seconds = checked
+        self.history_model.set_time_format(self.time_format_str())
+        for _, analog_clock in self.clocks:
+            analog_clock.set_show_seconds(checked)
+        self.ticker.set_granularity('second' if checked else 'minute')
+        self.update_ticker_state()
         self.update_clocks()
+        self.session_save_timer.start()
+
+    def change_canvas_mode(self, checked):
+        self.canvas_mode = checked
+        self.update_clocks_ui()
+        self.session_save_timer.start()
+
+    def time_format_str(self):
+        if self.time_format == '12':
+            return "%I:%M:%S %p" if self.show_seconds else "%I:%M %p"
+        return "%H:%M:%S" if self.show_seconds else "%H:%M"
+
+    def update_ticker_state(self, index=None):
+        active = (self.isVisible() and not self.isMinimized()
+                  and self.tabs.currentWidget() is self.clock_tab)
+        self.ticker.set_active(active)
+        self.sweep_animator.set_active(active and self.sweep_mode and self.show_seconds)
+
+    def sweep_clocks(self, now_utc):
+        if self.clock_canvas is not None:
+            self.clock_canvas.sweep_to(now_utc)
+            return
+        for _, analog_clock in self.clocks:
+            analog_clock.sweep_to(now_utc)
+
+    def change_sweep_mode(self, checked):
+        self.sweep_mode = checked
+        for _, analog_clock in self.clocks:
+            analog_clock.set_sweep(checked)
+        self.update_ticker_state()
+        self.session_save_timer.start()
+
+    def change_sweep_fps(self, fps):
+        self.sweep_fps = fps
+        self.sweep_animator.set_fps(fps)
+        self.session_save_timer.start()
+
+    def valid_settings(self, config):
+        # The session/config keys whose values have the right type and range;
+        # returns (settings, descriptions of what was rejected)
+        checks = {
+            'timezones': lambda value: isinstance(value, list) and all(isinstance(tz, str) for tz in value),
+            'time_format': lambda value: isinstance(value, str) and value in ('12', '24'),
+            'lang': lambda value: isinstance(value, str) and value in self.languages,
+            'theme': lambda value: isinstance(value, str) and value in self.theme_names,
+            'show_seconds': lambda value: isinstance(value, bool),
+            'canvas_mode': lambda value: isinstance(value, bool),
+            'sweep_mode': lambda value: isinstance(value, bool),
+            'sweep_fps': lambda value: isinstance(value, int) and not isinstance(value, bool)
+        }
+        settings = {}
+        rejected = []
+        for key, check in checks.items():
+            if key not in config:
+                continue
+            if check(config[key]):
+                settings[key] = config[key]
+            else:
+                rejected.append(key)
+        if 'timezones' in settings:
+            zones = list(dict.fromkeys(tz for tz in settings['timezones'] if tz in pytz.all_timezones_set))
+            unknown = [tz for tz in settings['timezones'] if tz not in pytz.all_timezones_set]
+            if unknown:
+                rejected.append('timezones (unknown: %s)' % ', '.join(unknown))
+            if zones:
+                settings['timezones'] = zones
+            else:
+                del settings['timezones']
+                if not unknown:
+                    rejected.append('timezones')
+        if 'sweep_fps' in settings:
+            settings['sweep_fps'] = min(max(settings['sweep_fps'], 1), 120)
+        return settings, rejected
+
+    def restore_session(self, session):
+        # Runs before the UI exists, so every widget is built once from it
+        settings, _ = self.valid_settings(session)
+        self.timezones = settings.get('timezones', self.timezones)
+        self.time_format = settings.get('time_format', self.time_format)
+        self.current_lang = settings.get('lang', self.current_lang)
+        self.current_theme = settings.get('theme', self.current_theme)
+        self.show_seconds = settings.get('show_seconds', self.show_seconds)
+        self.canvas_mode = settings.get('canvas_mode', self.canvas_mode)
+        self.sweep_mode = settings.get('sweep_mode', self.sweep_mode)
+        self.sweep_fps = settings.get('sweep_fps', self.sweep_fps)
+        offsets = session.get('offsets')
+        if isinstance(offsets, dict):
+            tz_resolver.prime({name: entry for name, entry in offsets.items()
+                               if isinstance(entry, list) and len(entry) == 3 and isinstance(entry[2], int)
+                               and all(value is None or isinstance(value, int) for value in entry)},
+                              datetime.now(pytz.utc))
+
+    def session_state(self):
+        return {
+            'timezones': self.timezones,
+            'time_format': self.time_format,
+            'lang': self.current_lang,
+            'theme': self.current_theme,
+            'show_seconds': self.show_seconds,
+            'canvas_mode': self.canvas_mode,
+            'sweep_mode': self.sweep_mode,
+            'sweep_fps': self.sweep_fps,
+            'offsets': {name: offset for name, offset in tz_resolver.snapshot().items()
+                        if name in self.timezones}
+        }
+
+    def save_session(self):
+        self.session_save_timer.stop()
+        try:
+            self.session_store.save(self.session_state())
+        except OSError as e:
+            self.status_text.setText(str(e))
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.update_ticker_state()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.update_ticker_state()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        # Displays skipped while clipped may have come back into view
+        if self.ticker.active:
+            self.update_clocks()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.Type.WindowStateChange:
+            self.update_ticker_state()
 
     def apply_settings(self):
         self.update_texts()
         self.apply_theme(self.current_theme)
         self.update_clocks()
 
+    def toggle_overlay(self, checked):
+        if checked:
+            metrics.enabled = True
+            if self.metrics_overlay is None:
+                self.metrics_overlay = QLabel(self.central_widget)
+                self.metrics_overlay.setFont(QFont("Consolas", 9))
+                self.metrics_overlay.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+                self.metrics_overlay.setObjectName('metrics_overlay')
+                self.overlay_timer = QTimer(self)
+                self.overlay_timer.timeout.connect(self.refresh_overlay)
+            self.metrics_overlay.show()
+            self.metrics_overlay.raise_()
+            self.refresh_overlay()
+            self.overlay_timer.start(1000)
+        elif self.metrics_overlay is not None:
+            self.overlay_timer.stop()
+            self.metrics_overlay.hide()
+            metrics.enabled = self.metrics_requested
+
+    def refresh_overlay(self):
+        self.metrics_overlay.setText(metrics.summary())
+        self.metrics_overlay.adjustSize()
+        self.metrics_overlay.move(self.central_widget.width() - self.metrics_overlay.width() - 10, 10)
+
+    def export_metrics(self, file_path=None):
+        # Periodic exports pass file_path; the menu action asks for one
+        interactive = not file_path
+        if interactive:
+            file_path, _ = QFileDialog.getSaveFileName(self, self.texts[self.current_lang]['export_metrics'], "metrics.prom",
+                                                       "Prometheus Text (*.prom *.txt)")
+        if not file_path:
+            return
+        # Replace atomically so scrapers never read a half-written file
+        tmp_path = file_path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(metrics.exposition())
+            os.replace(tmp_path, file_path)
+        except OSError as e:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            if interactive:
+                QMessageBox.warning(self, self.texts[self.current_lang]['export_metrics'], str(e))
+            else:
+                print('metrics: cannot write %s: %s' % (file_path, e), file=sys.stderr)
+
+    def start_metrics_export(self, port=None, file_path=None, interval=10000):
+        metrics.enabled = True
+        self.metrics_requested = True
+        if port:
+            # Only the metrics endpoint needs QtNetwork, so it stays off the startup path
+            from PyQt6.QtNetwork import QTcpServer, QHostAddress
+            self.metrics_server = MetricsServer(QTcpServer(self))
+            if not self.metrics_server.server.listen(QHostAddress(QHostAddress.SpecialAddress.LocalHost), port):
+                print('metrics: cannot listen on port %d: %s' % (port, self.metrics_server.server.errorString()),
+                      file=sys.stderr)
+        if file_path:
+            self.metrics_file_timer = QTimer(self)
+            self.metrics_file_timer.timeout.connect(lambda: self.export_metrics(file_path))
+            self.metrics_file_timer.start(interval)
+
     def show_about(self):
         QMessageBox.information(self, self.texts[self.current_lang]['about'], 
                                self.texts[self.current_lang]['about_text'])
 
     def add_timezone(self):
-        timezone = self.timezone_combo.currentText()
+        timezone = self.timezone_index.resolve(self.timezone_combo.currentText())
+        if timezone is None:
+            self.status_text.setText(self.texts[self.current_lang]['status_unknown_tz'].format(tz=self.timezone_combo.currentText()))
+            return
+        self.timezone_combo.setCurrentText(timezone)
         if timezone not in self.timezones:
-            self.timezones.append(timezone)
-            self.timezone_list.addItem(timezone)
-            self.update_clocks_ui()
+            self.insert_zone(len(self.timezones), timezone)
+            self.schedule_transitions()
+            self.update_clocks()
             self.status_text.setText(self.texts[self.current_lang]['status_added'].format(tz=timezone))
-            self.add_to_history(timezone)
 
     def remove_timezone(self):
         selected = self.timezone_list.currentItem()
         if selected and len(self.timezones) > 1:  # Keep at least one timezone
             timezone = selected.text()
-            self.timezones.remove(timezone)
-            self.timezone_list.takeItem(self.timezone_list.row(selected))
-            self.update_clocks_ui()
+            self.remove_zone(self.timezones.index(timezone))
+            self.schedule_transitions()
             self.status_text.setText(self.texts[self.current_lang]['status_removed'].format(tz=timezone))
-            self.add_to_history(timezone, removed=True)
+
+    def insert_zone(self, index, timezone):
+        self.timezones.insert(index, timezone)
+        self.timezone_list.insertItem(index, timezone)
+        self.insert_clock(index, timezone)
+        self.add_to_history(timezone)
+        self.session_save_timer.start()
+
+    def remove_zone(self, index):
+        timezone = self.timezones.pop(index)
+        self.timezone_list.takeItem(index)
+        self.remove_clock(index)
+        self.add_to_history(timezone, removed=True)
+        self.session_save_timer.start()
+
+    def move_zone(self, source, index):
+        self.timezones.insert(index, self.timezones.pop(source))
+        self.timezone_list.insertItem(index, self.timezone_list.takeItem(source))
+        self.clocks.insert(index, self.clocks.pop(source))
+        self.clock_labels.insert(index, self.clock_labels.pop(source))
+        if self.clock_canvas is not None:
+            self.clock_canvas.move_tile(self.clocks[index][1], index)
+        self.reflow_clocks(min(source, index))
+        self.session_save_timer.start()
+
+    def sync_zones(self, zones):
+        # Removes, inserts and moves only the clocks that differ from zones
+        for timezone in [tz for tz in self.timezones if tz not in zones]:
+            self.remove_zone(self.timezones.index(timezone))
+        for index, timezone in enumerate(zones):
+            if index < len(self.timezones) and self.timezones[index] == timezone:
+                continue
+            if timezone in self.timezones:
+                self.move_zone(self.timezones.index(timezone), index)
+            else:
+                self.insert_zone(index, timezone)
+
+    def watch_config(self, path):
+        self.config_watcher = ConfigWatcher(path, self)
+        self.config_watcher.changed.connect(self.apply_config)
+        self.config_watcher.failed.connect(self.config_failed)
+        self.config_watcher.reload()
+
+    def config_failed(self, message):
+        # The status line is overwritten by the next tick, so it goes to stderr too
+        print('config: %s' % message, file=sys.stderr)
+        self.status_text.setText(message)
+
+    def apply_config(self, config):
+        # Same keys as the session file; anything missing or invalid keeps
+        # its current value and unchanged settings are not re-applied
+        config, rejected = self.valid_settings(config)
+        if rejected and self.config_watcher is not None:
+            self.config_watcher.failed.emit('%s: invalid %s' % (self.config_watcher.path.name, ', '.join(rejected)))
+        self.clock_tab.setUpdatesEnabled(False)
+        if config.get('time_format', self.time_format) != self.time_format:
+            self.change_format(0 if config['time_format'] == '12' else 1)
+        if config.get('lang', self.current_lang) != self.current_lang:
+            self.change_language(self.languages.index(config['lang']))
+        if config.get('theme', self.current_theme) != self.current_theme:
+            self.change_theme(self.theme_names.index(config['theme']))
+        if config.get('show_seconds', self.show_seconds) != self.show_seconds:
+            self.change_show_seconds(config['show_seconds'])
+        if config.get('canvas_mode', self.canvas_mode) != self.canvas_mode:
+            self.change_canvas_mode(config['canvas_mode'])
+        if config.get('sweep_mode', self.sweep_mode) != self.sweep_mode:
+            self.change_sweep_mode(config['sweep_mode'])
+        if config.get('sweep_fps', self.sweep_fps) != self.sweep_fps:
+            self.change_sweep_fps(config['sweep_fps'])
+        # Zones go last so new displays are created with the new format and
+        # language; update_clocks skips them until they are laid out
+        if 'timezones' in config:
+            self.sync_zones(config['timezones'])
+        # One rebuild of the upcoming list for the whole board
+        self.schedule_transitions()
+        self.sync_setting_widgets()
+        self.clock_tab.setUpdatesEnabled(True)
+        self.update_clocks()
+
+    def sync_setting_widgets(self):
+        # Reflect settings changed from outside without re-running the handlers
+        widgets = [(self.format_combo, self.format_combo.setCurrentIndex, 0 if self.time_format == '12' else 1)]
+        if self.settings_tab_built:
+            widgets += [
+                (self.language_combo, self.language_combo.setCurrentIndex, self.languages.index(self.current_lang)),
+                (self.theme_combo, self.theme_combo.setCurrentIndex, list(self.themes).index(self.current_theme)),
+                (self.show_seconds_check, self.show_seconds_check.setChecked, self.show_seconds),
+                (self.canvas_mode_check, self.canvas_mode_check.setChecked, self.canvas_mode),
+                (self.sweep_mode_check, self.sweep_mode_check.setChecked, self.sweep_mode),
+                (self.sweep_fps_spin, self.sweep_fps_spin.setValue, self.sweep_fps)
+            ]
+        for widget, setter, value in widgets:
+            widget.blockSignals(True)
+            setter(value)
+            widget.blockSignals(False)
 
     def update_clocks_ui(self):
         # Clear existing clocks
@@ -721,133 +2601,294 @@ class DigitalClock(QMainWindow):
         for i in reversed(range(self.analog_layout.count())):
             self.analog_layout.itemAt(i).widget().setParent(None)
         self.clocks = []
-
-        # Add new clocks
+        self.clock_labels = []
+
+        # In canvas mode one widget draws every analog clock
+        self.clock_canvas = None
+        if self.canvas_mode:
+            self.clock_canvas = ClockCanvas()
+            self.clock_canvas.set_theme(self.current_theme, self.clock_colors(self.current_theme))
+            self.clock_canvas.set_show_seconds(self.show_seconds)
+            self.clock_canvas.set_sweep(self.sweep_mode)
+            self.analog_layout.addWidget(self.clock_canvas, 0, 0, 1, 2)
+
+        # Build every clock, then place them all in one layout pass
+        self.clock_tab.setUpdatesEnabled(False)
         for i, tz in enumerate(self.timezones):
-            # Digital clock
-            digital_display = QLineEdit()
-            digital_display.setReadOnly(True)
-            digital_display.setFixedHeight(40)
-            digital_display.setStyleSheet("""
-                QLineEdit {
-                    border-radius: 8px;
-                    padding: 8px;
-                    font-size: 14px;
-                    border: 1px solid rgba(0, 0, 0, 0.2);
-                    background: rgba(255, 255, 255, 0.95);
-                    color: black;
-                }
-            """)
-            digital_label = QLabel(tz)
-            digital_label.setFont(QFont("Segoe UI", 10))
-            digital_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.digital_layout.addWidget(digital_label, i * 2, 0)
-            self.digital_layout.addWidget(digital_display, i * 2 + 1, 0)
-
-            # Analog clock
-            analog_clock = ClockWidget(tz)
-            self.analog_layout.addWidget(analog_clock, i // 2, i % 2)
-            analog_label = QLabel(tz)
-            analog_label.setFont(QFont("Segoe UI", 10))
-            analog_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.analog_layout.addWidget(analog_label, (i // 2) + 1, i % 2)
-
-            self.clocks.append((digital_display, analog_clock))
+            clock, labels = self.create_clock_widgets(i, tz)
+            self.clocks.append(clock)
+            self.clock_labels.append(labels)
+        self.reflow_clocks()
+        self.clock_tab.setUpdatesEnabled(True)
 
         self.update_clocks()
 
-    def update_clocks(self):
+    def create_clock_widgets(self, index, tz):
+        # Digital clock
+        digital_display = QLineEdit()
+        digital_display.setReadOnly(True)
+        digital_display.setFixedHeight(40)
+        # update_clocks skips displays that are not on screen yet
+        digital_display.setText(time_formatter.format(tz, datetime.now(pytz.utc), self.time_format_str(),
+                                                      self.current_lang))
+        digital_label = QLabel(tz)
+        digital_label.setFont(QFont("Segoe UI", 10))
+        digital_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
+        # Analog clock
+        if self.clock_canvas is not None:
+            return (digital_display, self.clock_canvas.insert_tile(index, tz)), (digital_label, None)
+        analog_clock = ClockWidget(tz)
+        analog_clock.set_theme(self.current_theme, self.clock_colors(self.current_theme))
+        analog_clock.set_show_seconds(self.show_seconds)
+        analog_clock.set_sweep(self.sweep_mode)
+        analog_label = QLabel(tz)
+        analog_label.setFont(QFont("Segoe UI", 10))
+        analog_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
+        return (digital_display, analog_clock), (digital_label, analog_label)
+
+    def insert_clock(self, index, tz):
+        clock, labels = self.create_clock_widgets(index, tz)
+        self.clocks.insert(index, clock)
+        self.clock_labels.insert(index, labels)
+        self.reflow_clocks(index)
+
+    def remove_clock(self, index):
+        digital_display, analog_clock = self.clocks.pop(index)
+        digital_label, analog_label = self.clock_labels.pop(index)
+        for widget in (digital_display, digital_label):
+            self.digital_layout.removeWidget(widget)
+            widget.hide()
+            widget.deleteLater()
+        if self.clock_canvas is not None:
+            self.clock_canvas.remove_tile(analog_clock)
+        else:
+            for widget in (analog_clock, analog_label):
+                self.analog_layout.removeWidget(widget)
+                widget.hide()
+                widget.deleteLater()
+        self.reflow_clocks(index)
+
+    def reflow_clocks(self, start=0):
+        # Only clocks from start onward change grid cells; widgets are moved, not rebuilt
+        for i in range(start, len(self.clocks)):
+            digital_display, analog_clock = self.clocks[i]
+            digital_label, analog_label = self.clock_labels[i]
+            self.digital_layout.removeWidget(digital_label)
+            self.digital_layout.removeWidget(digital_display)
+            self.digital_layout.addWidget(digital_label, i * 2, 0)
+            self.digital_layout.addWidget(digital_display, i * 2 + 1, 0)
+
+            if self.clock_canvas is not None:
+                continue
+            row, col = (i // 2) * 2, i % 2
+            self.analog_layout.removeWidget(analog_clock)
+            self.analog_layout.removeWidget(analog_label)
+            self.analog_layout.addWidget(analog_clock, row, col)
+            self.analog_layout.addWidget(analog_label, row + 1, col)
+
+    def update_clocks(self, now_utc=None):
+        started = metrics.start()
+        if now_utc is None:
+            now_utc = datetime.now(pytz.utc)
+        format_str = self.time_format_str()
+        lang = self.current_lang
         for i, (digital_display, analog_clock) in enumerate(self.clocks):
-            timezone = pytz.timezone(self.timezones[i])
-            current_time = datetime.now(timezone)
-            format_str = "%I:%M:%S %p" if self.time_format == '12' else "%H:%M:%S"
-            time_str = current_time.strftime(format_str)
-            digital_display.setText(time_str)
-            analog_clock.update_time()
-        self.status_text.setText(self.texts[self.current_lang]['status_updated'].format(time=datetime.now(pytz.timezone(self.timezones[0])).strftime(format_str)))
+            analog_clock.update_time(now_utc)
+            # Off-screen displays catch up on the next tick or resize
+            if digital_display.visibleRegion().isEmpty():
+                continue
+            time_str = time_formatter.format(self.timezones[i], now_utc, format_str, lang)
+            if digital_display.text() != time_str:
+                digital_display.setText(time_str)
+        status = self.texts[lang]['status_updated'].format(
+            time=time_formatter.format(self.timezones[0], now_utc, format_str, lang))
+        if self.status_text.toPlainText() != status:
+            self.status_text.setText(status)
+        metrics.stop('update_clocks', started)
+
+    def schedule_transitions(self, now_utc=None):
+        # Lists each zone's next offset change and wakes up at the earliest one
+        if now_utc is None:
+            now_utc = datetime.now(pytz.utc)
+        texts = self.texts[self.current_lang]
+        date_format = '%Y-%m-%d ' + ('%I:%M %p' if self.time_format == '12' else '%H:%M')
+        self.upcoming_list.clear()
+        changes = tz_resolver.upcoming_changes(self.timezones, now_utc)
+        for epoch, name, before, after, dst in changes:
+            local = tz_resolver.convert(name, datetime.fromtimestamp(epoch, pytz.utc))
+            if dst and after > before:
+                kind = 'dst_starts'
+            elif not dst and after < before:
+                kind = 'dst_ends'
+            else:
+                kind = 'offset_changes'
+            self.upcoming_list.addItem(texts['upcoming_item'].format(
+                zone=name, when=time_formatter.render(local, date_format, self.current_lang),
+                old=format_offset(before), new=format_offset(after), kind=texts[kind]))
+        if not changes:
+            self.upcoming_list.addItem(texts['upcoming_none'])
+            self.transition_timer.stop()
+            return
+        # Long waits are re-armed daily rather than trusted to one timer
+        delay = (changes[0][0] - now_utc.timestamp()) * 1000 + ClockTicker.slack_ms
+        self.transition_timer.start(int(min(max(delay, 0), 24 * 3600 * 1000)))
+
+    def transition_reached(self):
+        self.update_clocks()
+        self.schedule_transitions()
 
     def copy_to_clipboard(self):
-        times = [digital.text() + f" ({tz})" for digital, _ in self.clocks for tz in self.timezones]
+        now_utc = datetime.now(pytz.utc)
+        format_str = self.time_format_str()
+        times = [time_formatter.format(tz, now_utc, format_str, self.current_lang) + f" ({tz})"
+                 for tz in self.timezones]
         if times:
             QApplication.clipboard().setText("\n".join(times))
             self.status_text.setText(self.texts[self.current_lang]['status_updated'].format(time="Times copied to clipboard"))
 
     def add_to_history(self, timezone, removed=False):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        for i, tz in enumerate(self.timezones):
-            current_time = datetime.now(pytz.timezone(tz))
-            format_str = "%I:%M:%S %p" if self.time_format == '12' else "%H:%M:%S"
-            time_str = current_time.strftime(format_str)
-            self.history.append({
-                'time': time_str,
-                'timezone': tz,
-                'date': timestamp,
-                'action': 'Removed' if removed and tz == timezone else 'Added' if tz == timezone else 'Updated'
-            })
-        self.save_history()
-        self.update_history_ui()
+        # One event for the zone acted on; the rest of the board is captured
+        # by a checkpoint every HistoryLog.checkpoint_interval events
+        epoch = int(datetime.now(pytz.utc).timestamp())
+        action = HistoryAction.REMOVED if removed else HistoryAction.ADDED
+        records = [{'e': epoch, 'z': timezone, 'a': action.label}]
+        self.history_model.append_rows([(epoch, timezone, action)])
+        if self.history.needs_checkpoint():
+            records.append(self.checkpoint_history(epoch))
+        self.history_store.append(records)
+
+    def checkpoint_history(self, epoch):
+        self.history.add_checkpoint(epoch, self.timezones)
+        return {'op': 'checkpoint', 'e': epoch, 'zones': list(self.timezones)}
 
     def save_history(self):
-        with open('clock_history.json', 'w', encoding='utf-8') as f:
-            json.dump(self.history, f, ensure_ascii=False, indent=4)
+        self.history_store.flush()
 
     def load_history(self):
-        try:
-            with open('clock_history.json', 'r', encoding='utf-8') as f:
-                self.history = json.load(f)
-        except FileNotFoundError:
-            self.history = []
+        self.history_loader = HistoryLoader(self.history_store, self)
+        self.history_loader.loaded.connect(self.history_loaded)
+        self.history_loader.start()
+
+    def history_loaded(self, history):
+        loader = self.sender()
+        loader.deleteLater()
+        self.history_loader = None
+        if loader.stale:
+            return
+        # Entries added while loading follow the stored ones
+        history.extend(self.history)
+        self.history = history
+        self.update_history_ui()
+        self.history_flush_timer.start(2000)
+        self.profiler.mark('history loaded')
+        self.profiler.report()
 
     def save_history_to_file(self):
-        file_path, _ = QFileDialog.getSaveFileName(self, self.texts[self.current_lang]['save_history'], "", "JSON Files (*.json)")
-        if file_path:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(self.history, f, ensure_ascii=False, indent=4)
+        file_types = {
+            "JSON Lines (*.jsonl)": '.jsonl',
+            "CSV Files (*.csv)": '.csv',
+            "JSON Files (*.json)": '.json',
+            "Compressed JSON Lines (*.jsonl.gz)": '.jsonl.gz',
+            "Compressed CSV Files (*.csv.gz)": '.csv.gz'
+        }
+        file_path, selected = QFileDialog.getSaveFileName(self, self.texts[self.current_lang]['save_history'], "",
+                                                          ";;".join(file_types))
+        if not file_path:
+            return
+        if not any(file_path.endswith(ext) for ext in file_types.values()):
+            file_path += file_types.get(selected, '.jsonl')
+
+        # Exports the rows matching the current history filter
+        model = self.history_model
+        rows = list(range(len(self.history))) if model.rows is None else list(model.rows)
+        self.export_worker = HistoryExportWorker(self.history, rows, model.time_format, file_path, self)
+        self.export_progress = QProgressDialog(self.texts[self.current_lang]['save_history'],
+                                               self.texts[self.current_lang]['cancel'], 0, max(len(rows), 1), self)
+        self.export_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self.export_progress.setMinimumDuration(500)
+        self.export_progress.canceled.connect(self.export_worker.cancel)
+        self.export_worker.progress.connect(lambda done, total: self.export_progress.setValue(done))
+        self.export_worker.failed.connect(lambda error: QMessageBox.warning(self, self.texts[self.current_lang]['save_history'], error))
+        self.export_worker.finished.connect(self.history_export_finished)
+        self.save_history_btn.setEnabled(False)
+        self.export_worker.start()
+
+    def history_export_finished(self):
+        self.export_progress.reset()
+        self.save_history_btn.setEnabled(True)
+        if not self.export_worker.cancelled and self.export_worker.error is None:
             self.status_text.setText(self.texts[self.current_lang]['status_updated'].format(time="History saved to file"))
+        self.export_worker.deleteLater()
+        self.export_worker = None
 
     def update_history_ui(self):
-        # Clear existing widgets
-        for i in reversed(range(self.history_grid.count())):
-            self.history_grid.itemAt(i).widget().setParent(None)
-
-        # Add headers
-        headers = [
-            self.texts[self.current_lang]['history_time'],
-            self.texts[self.current_lang]['history_timezone'],
-            self.texts[self.current_lang]['history_date'],
-            'Action'
-        ]
-        for col, header in enumerate(headers):
-            label = QLabel(header)
-            label.setStyleSheet("font-weight: bold; font-size: 14px; padding: 5px; color: black;")
-            label.setAlignment(Qt.AlignmentFlag.AlignRight if self.current_lang == 'fa' else Qt.AlignmentFlag.AlignLeft)
-            self.history_grid.addWidget(label, 0, col)
-
-        # Add history items
-        for row, item in enumerate(self.history, 1):
-            time_label = QLabel(item['time'])
-            timezone_label = QLabel(item['timezone'])
-            date_label = QLabel(item['date'])
-            action_label = QLabel(item['action'])
-            
-            for label in [time_label, timezone_label, date_label, action_label]:
-                label.setStyleSheet("font-size: 12px; padding: 5px; border-bottom: 1px solid rgba(0, 0, 0, 0.1); color: black;")
-                label.setWordWrap(True)
-                label.setAlignment(Qt.AlignmentFlag.AlignRight if self.current_lang == 'fa' else Qt.AlignmentFlag.AlignLeft)
-            
-            self.history_grid.addWidget(time_label, row, 0)
-            self.history_grid.addWidget(timezone_label, row, 1)
-            self.history_grid.addWidget(date_label, row, 2)
-            self.history_grid.addWidget(action_label, row, 3)
+        started = metrics.start()
+        self.history_model.set_history(self.history)
+        metrics.stop('update_history_ui', started)
+
+    def apply_history_filter(self, *args):
+        action_index = self.history_action_filter.currentIndex()
+        seconds = self.history_ranges[max(self.history_range_filter.currentIndex(), 0)][1]
+        since = int(datetime.now(pytz.utc).timestamp()) - seconds if seconds else None
+        self.history_model.set_filter(
+            zone_pattern=self.history_zone_filter.text().strip(),
+            action=HistoryAction(action_index - 1) if action_index > 0 else None,
+            since=since
+        )
 
     def clear_history(self):
-        self.history = []
-        self.save_history()
+        # A load still in flight would bring back the cleared entries; it is
+        # still waited for on close
+        if self.history_loader is not None:
+            self.history_loader.stale = True
+        self.history_flush_timer.start(2000)
+        self.history = HistoryLog()
+        self.history_store.clear()
+        self.history_store.append([self.checkpoint_history(int(datetime.now(pytz.utc).timestamp()))])
         self.update_history_ui()
 
+    def closeEvent(self, event):
+        if self.export_worker is not None:
+            self.export_worker.cancel()
+            self.export_worker.wait()
+        if self.history_loader is not None:
+            self.history_loader.wait()
+        self.history_store.close()
+        self.save_session()
+        super().closeEvent(event)
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Digital & Analog Clock')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='print import and construction time per startup phase')
+    parser.add_argument('--metrics', action='store_true',
+                        help='record tick, update and paint latency histograms from startup')
+    parser.add_argument('--metrics-port', type=int,
+                        help='serve metrics in Prometheus text format on 127.0.0.1:PORT')
+    parser.add_argument('--metrics-file', help='rewrite metrics in Prometheus text format to this file every 10 s')
+    parser.add_argument('--config', help='apply this JSON board config and reapply it whenever the file changes')
+    # Anything unrecognized is left for Qt
+    args, rest = parser.parse_known_args(argv[1:])
+    return args, argv[:1] + rest
+
+
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
+    args, qt_argv = parse_args(sys.argv)
+    profiler = StartupProfiler(args.profile_startup, startup_marks)
+    metrics.enabled = args.metrics
+    app = QApplication(qt_argv)
     app.setStyle('Windows')
-    window = DigitalClock()
+    profiler.mark('QApplication')
+    window = DigitalClock(profiler)
+    profiler.mark('DigitalClock')
+    if args.metrics_port or args.metrics_file:
+        window.start_metrics_export(args.metrics_port, args.metrics_file)
+    if args.config:
+        window.watch_config(args.config)
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    profiler.mark('show')
+    # The first zero-timeout callback runs after the initial paint is queued
+    QTimer.singleShot(0, lambda: (profiler.mark('first frame'), profiler.report()))
+    sys.exit(app.exec())
@@ -0,0 +1,33 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from digital_analog_clock import TimezoneIndex
+
+
+class OffsetQueryTest(unittest.TestCase):
+    def setUp(self):
+        self.index = TimezoneIndex()
+
+    def test_offsets(self):
+        cases = {
+            '+3:30': 'utc+03:30',
+            'utc-5': 'utc-05:00',
+            'gmt+0530': 'utc+05:30',
+            '+530': 'utc+05:30',
+            '+12': 'utc+12:00',
+            '-3:': 'utc-03:00',
+            'utc + 4 : 30': 'utc+04:30'
+        }
+        for query, expected in cases.items():
+            self.assertEqual(self.index.offset_query(query), expected, query)
+
+    def test_not_offsets(self):
+        for query in ['', '+', 'utc', 'tehran', '3:30', '+1::', '+1:2:3', '+:30', '+12345', '+1a', '++1']:
+            self.assertIsNone(self.index.offset_query(query), query)
+
+
+if __name__ == '__main__':
+    unittest.main()